@@ -0,0 +1,13 @@
+"""
+Test settings for Housing Evaluation System.
+"""
+
+from .development import *
+
+# base.py only skips the request logger for the development module; keep the
+# test run as quiet as development.
+MIDDLEWARE = [m for m in MIDDLEWARE if m != "core.middleware.RequestLoggingMiddleware"]
+
+# Keep session data in a signed cookie so every authenticated view test (and
+# every login) doesn't read and write the django_session table.
+SESSION_ENGINE = "django.contrib.sessions.backends.signed_cookies"
@@ -0,0 +1,48 @@
+import inspect
+from importlib import import_module
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+
+
+class TestSuiteBaseClassTest(SimpleTestCase):
+    """
+    Keep database tests on django.test.TestCase.
+
+    TransactionTestCase (and LiveServerTestCase, which builds on it) truncates
+    every table on teardown instead of rolling back a savepoint, which is far
+    slower.
+    """
+
+    def _local_test_modules(self):
+        """Yield the tests module of every app that lives in this repository."""
+        base_dir = Path(settings.BASE_DIR)
+        for app_config in apps.get_app_configs():
+            if not Path(app_config.path).is_relative_to(base_dir):
+                continue
+            module_name = f"{app_config.name}.tests"
+            try:
+                yield import_module(module_name)
+            except ModuleNotFoundError as e:
+                if e.name != module_name:
+                    raise
+
+    def test_no_transaction_test_cases(self):
+        offenders = []
+        for module in self._local_test_modules():
+            for name, cls in inspect.getmembers(module, inspect.isclass):
+                if cls.__module__ != module.__name__:
+                    continue
+                if issubclass(cls, TransactionTestCase) and not issubclass(
+                    cls, TestCase
+                ):
+                    offenders.append(f"{module.__name__}.{name}")
+
+        self.assertEqual(
+            offenders,
+            [],
+            "Use django.test.TestCase instead of TransactionTestCase or "
+            "LiveServerTestCase unless a test really needs committed transactions.",
+        )
@@ -1,6 +1,30 @@
+import logging
+
 from django.apps import AppConfig
 
+logger = logging.getLogger(__name__)
+
 
 class ProjectsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "projects"
+
+    def ready(self):
+        # Build the URL resolver's lookup tables at startup instead of on the
+        # first request each worker serves.
+        try:
+            from django.conf import settings
+            from django.urls import get_resolver
+            from django.utils import translation
+
+            resolver = get_resolver()
+            # The reverse lookups are cached per active language. Without
+            # LocaleMiddleware every request runs under LANGUAGE_CODE, so that
+            # is the only one worth warming.
+            with translation.override(settings.LANGUAGE_CODE):
+                resolver.reverse_dict
+                for _prefix, namespace_resolver in resolver.namespace_dict.values():
+                    namespace_resolver.reverse_dict
+        except Exception:
+            # Best-effort only; a broken URLconf still surfaces on first use.
+            logger.exception("Could not warm up the URL resolver")
@@ -0,0 +1,20 @@
+"""
+Path converters for the projects app.
+"""
+
+
+class TokenConverter:
+    """
+    Match an invitation token in its 22-character base64url form.
+
+    The value is passed to the view as a string; decoding it back to a UUID
+    only happens in the view that handles the invitation.
+    """
+
+    regex = r"[A-Za-z0-9_-]{22}"
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
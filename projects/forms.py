@@ -1,4 +1,6 @@
 from django import forms
+from django.db import transaction
+from django.utils import timezone
 
 from .models import Criteria, Project, Realtor, Visit, VisitAssessment, VisitPhoto
 
@@ -105,6 +107,11 @@ class RealtorForm(forms.ModelForm):
             ),
         }
 
+    def __init__(self, *args, project=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Needed to check the name is unique within the project
+        self.project = project
+
     def clean_name(self):
         name = self.cleaned_data.get("name")
         if name:
@@ -113,6 +120,15 @@ class RealtorForm(forms.ModelForm):
                 raise forms.ValidationError(
                     "Realtor name must be at least 2 characters long."
                 )
+            if (
+                self.project
+                and Realtor.objects.filter(project=self.project, name=name)
+                .exclude(pk=self.instance.pk)
+                .exists()
+            ):
+                raise forms.ValidationError(
+                    "A realtor with this name already exists in this project."
+                )
         return name
 
 
@@ -152,6 +168,11 @@ class CriteriaForm(forms.ModelForm):
             ),
         }
 
+    def __init__(self, *args, project=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Needed to check the name is unique within the project
+        self.project = project
+
     def clean_name(self):
         name = self.cleaned_data.get("name")
         if name:
@@ -160,6 +181,15 @@ class CriteriaForm(forms.ModelForm):
                 raise forms.ValidationError(
                     "Criteria name must be at least 2 characters long."
                 )
+            if (
+                self.project
+                and Criteria.objects.filter(project=self.project, name=name)
+                .exclude(pk=self.instance.pk)
+                .exists()
+            ):
+                raise forms.ValidationError(
+                    "A criteria with this name already exists in this project."
+                )
         return name
 
     def clean_weight(self):
@@ -273,10 +303,12 @@ class VisitAssessmentForm(forms.Form):
     def __init__(self, project, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.project = project
+        # Loaded once and reused by save_assessments()
+        self.criteria = list(project.criteria.all())
 
         # Create fields for each criteria
         criteria_count = 0
-        for criteria in project.criteria.all():
+        for criteria in self.criteria:
             field_name = f"criteria_{criteria.id}"
             criteria_count += 1
 
@@ -341,7 +373,9 @@ class VisitAssessmentForm(forms.Form):
         if settings.DEBUG:
             logger = logging.getLogger(__name__)
             logger.debug(
-                f"VisitAssessmentForm initialized with {criteria_count} criteria, {len(self.fields)} fields"
+                "VisitAssessmentForm initialized with %s criteria, %s fields",
+                criteria_count,
+                len(self.fields),
             )
 
     def save_assessments(self, visit):
@@ -354,34 +388,65 @@ class VisitAssessmentForm(forms.Form):
 
         assessments = []
         if settings.DEBUG:
-            logger.debug(f"Saving assessments for visit {visit.id}")
-            logger.debug(f"Cleaned data: {self.cleaned_data}")
+            logger.debug("Saving assessments for visit %s", visit.pk)
+            logger.debug("Cleaned data: %s", self.cleaned_data)
+
+        # Update existing assessments and create the rest in two bulk queries
+        existing = {a.criteria_id: a for a in visit.assessments.order_by()}
+        to_create = []
+        to_update = []
+        now = timezone.now()
 
-        for criteria in self.project.criteria.all():
+        for criteria in self.criteria:
             field_name = f"criteria_{criteria.id}"
             value = self.cleaned_data.get(field_name)
 
             if settings.DEBUG:
-                logger.debug(f"Processing {field_name} ({criteria.name}): {value}")
+                logger.debug("Processing %s (%s): %s", field_name, criteria.name, value)
 
             if value is not None and value != "":
-                # Get or create assessment
-                assessment, created = VisitAssessment.objects.get_or_create(
-                    visit=visit, criteria=criteria
-                )
+                assessment = existing.get(criteria.id)
+                if assessment is None:
+                    assessment = VisitAssessment(visit=visit, criteria=criteria)
+                    to_create.append(assessment)
+                else:
+                    assessment.criteria = criteria
+                    # bulk_update() skips auto_now
+                    assessment.updated_at = now
+                    to_update.append(assessment)
                 assessment.set_value(value)
-                assessment.save()
                 assessments.append(assessment)
 
                 if settings.DEBUG:
                     logger.debug(
-                        f"Saved assessment for {criteria.name}: {assessment.get_value()}"
+                        "Saved assessment for %s: %s",
+                        criteria.name,
+                        assessment.get_value(),
                     )
 
-        logger.info(f"Saved {len(assessments)} assessments for visit {visit.id}")
+        with transaction.atomic():
+            VisitAssessment.objects.bulk_create(to_create)
+            VisitAssessment.objects.bulk_update(
+                to_update,
+                [
+                    "value_text",
+                    "value_numeric",
+                    "value_boolean",
+                    "value_rating",
+                    "updated_at",
+                ],
+            )
+
+        logger.info("Saved %s assessments for visit %s", len(assessments), visit.pk)
         return assessments
 
 
+# Image formats accepted for visit photos
+ALLOWED_PHOTO_CONTENT_TYPES = frozenset(
+    {"image/jpeg", "image/png", "image/gif", "image/webp"}
+)
+
+
 class VisitPhotoForm(forms.ModelForm):
     """Form for uploading visit photos."""
 
@@ -414,7 +479,7 @@ class VisitPhotoForm(forms.ModelForm):
                 )
 
             # Check file type
-            if not image.content_type.startswith("image/"):
+            if image.content_type not in ALLOWED_PHOTO_CONTENT_TYPES:
                 raise forms.ValidationError("Please upload a valid image file.")
 
         return image
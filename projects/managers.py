@@ -0,0 +1,30 @@
+"""
+Custom querysets for the projects app.
+"""
+
+from django.db import models
+from django.db.models import Exists, OuterRef, Q
+
+
+class ProjectQuerySet(models.QuerySet):
+    """QuerySet helpers for loading projects and their related rows."""
+
+    def for_member(self, user):
+        """Projects the user owns or collaborates on."""
+        # An EXISTS on the membership table rather than joining it, so there
+        # are no duplicate rows to remove with DISTINCT
+        collaborating = self.model.collaborators.through.objects.filter(
+            project_id=OuterRef("pk"), user_id=user.pk
+        )
+        return self.filter(Q(owner=user) | Exists(collaborating))
+
+    def with_related(self):
+        """
+        Load the owner and the relations the project pages display up front,
+        so templates iterating projects don't run a query per project.
+        """
+        return self.select_related("owner").prefetch_related("collaborators", "visits")
+
+    def with_criteria_count(self):
+        """Annotate each project with its number of criteria as criteria_count."""
+        return self.annotate(criteria_count=models.Count("criteria"))
@@ -1,10 +1,13 @@
+import base64
 import uuid
 
 from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 
+from .managers import ProjectQuerySet
+
 
 class Project(models.Model):
     """
@@ -27,6 +30,8 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     finished_at = models.DateTimeField(null=True, blank=True)
 
+    objects = ProjectQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
 
@@ -37,11 +42,7 @@ class Project(models.Model):
         """Mark project as finished and set timestamp."""
         self.status = "finished"
         self.finished_at = timezone.now()
-        self.save()
-
-    def is_member(self, user):
-        """Check if user is owner or collaborator."""
-        return user == self.owner or self.collaborators.filter(id=user.id).exists()
+        self.save(update_fields=["status", "finished_at"])
 
 
 class Realtor(models.Model):
@@ -91,19 +92,12 @@ class Realtor(models.Model):
             contacts.append(self.email)
         return " | ".join(contacts) if contacts else ""
 
-    def can_be_edited_by(self, user):
-        """
-        Check if a user can edit this realtor.
-        Any project member can edit project realtors.
-        """
-        return self.project.is_member(user)
-
     def can_be_deleted_by(self, user):
         """
         Check if a user can delete this realtor.
         Only the creator or project owner can delete realtors.
         """
-        return user == self.created_by or user == self.project.owner
+        return user.pk in (self.created_by_id, self.project.owner_id)
 
 
 class Criteria(models.Model):
@@ -273,12 +267,26 @@ class ProjectInvitation(models.Model):
         status = "Accepted" if self.accepted else "Pending"
         return f"{self.project.name} - {self.email} ({status})"
 
+    @property
+    def token_str(self):
+        """The token as the 22-character base64url string used in links."""
+        return base64.urlsafe_b64encode(self.token.bytes).rstrip(b"=").decode()
+
+    @staticmethod
+    def token_from_str(value):
+        """Decode a token_str back to a UUID, or return None if it's malformed."""
+        try:
+            return uuid.UUID(bytes=base64.urlsafe_b64decode(value + "=="))
+        except ValueError:
+            return None
+
     def accept_invitation(self, user):
         """Accept the invitation and add user as collaborator."""
         if not self.accepted:
             self.accepted = True
             self.accepted_at = timezone.now()
-            self.save()
-            self.project.collaborators.add(user)
+            with transaction.atomic():
+                self.save(update_fields=["accepted", "accepted_at"])
+                self.project.collaborators.add(user)
             return True
         return False
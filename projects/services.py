@@ -7,9 +7,25 @@ from typing import Any, Dict
 
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+# Shared across EmailService instances so connections to Mailgun are kept
+# alive and reused instead of doing a new TLS handshake for every email.
+# Retry's defaults only re-send a POST when the connection failed before the
+# request went out, so an email is never sent twice.
+_session = requests.Session()
+_session.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=3, backoff_factor=0.2),
+    ),
+)
+
 
 class EmailService:
     """Service for sending emails via Mailgun API."""
@@ -62,7 +78,7 @@ class EmailService:
 
             # Prepare Mailgun API request
             url = f"https://api.mailgun.net/v3/{self.domain}/messages"
-            logger.info(f"Sending email to {recipient_email}: {subject}")
+            logger.info("Sending email to %s: %s", recipient_email, subject)
 
             auth = ("api", self.api_key)
 
@@ -74,10 +90,10 @@ class EmailService:
             }
 
             # Send the email
-            response = requests.post(url, auth=auth, data=data, timeout=30)
+            response = _session.post(url, auth=auth, data=data, timeout=30)
             response.raise_for_status()
 
-            logger.info(f"Email sent successfully via Mailgun to {recipient_email}")
+            logger.info("Email sent successfully via Mailgun to %s", recipient_email)
             return {
                 "status": "success",
                 "message": "Email sent successfully",
@@ -86,7 +102,7 @@ class EmailService:
 
         except requests.exceptions.HTTPError as e:
             logger.error(
-                f"Mailgun API error: {e.response.status_code} - {e.response.text}"
+                "Mailgun API error: %s - %s", e.response.status_code, e.response.text
             )
             return {
                 "status": "error",
@@ -94,10 +110,10 @@ class EmailService:
                 "details": e.response.text,
             }
         except requests.exceptions.RequestException as e:
-            logger.error(f"Network error sending email: {str(e)}")
+            logger.error("Network error sending email: %s", e)
             return {"status": "error", "message": f"Network error: {str(e)}"}
         except Exception as e:
-            logger.error(f"Unexpected error sending email: {str(e)}")
+            logger.error("Unexpected error sending email: %s", e)
             return {"status": "error", "message": f"Unexpected error: {str(e)}"}
 
     def send_invitation_email(
@@ -138,7 +154,7 @@ class EmailService:
             )
 
         except Exception as e:
-            logger.error(f"Error sending invitation email: {str(e)}")
+            logger.error("Error sending invitation email: %s", e)
             return {
                 "status": "error",
                 "message": f"Error sending invitation email: {str(e)}",
@@ -162,7 +178,7 @@ class EmailService:
                 or not user.profile.receive_confirmation_emails
             ):
                 logger.info(
-                    f"Skipping confirmation email for user {user.email} - opted out"
+                    "Skipping confirmation email for user %s - opted out", user.email
                 )
                 return {
                     "status": "skipped",
@@ -189,7 +205,7 @@ class EmailService:
             )
 
         except Exception as e:
-            logger.error(f"Error sending home upload confirmation: {str(e)}")
+            logger.error("Error sending home upload confirmation: %s", e)
             return {
                 "status": "error",
                 "message": f"Error sending confirmation email: {str(e)}",
@@ -1,11 +1,31 @@
-from datetime import date
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
 from django.contrib.auth.models import User
-from django.db import IntegrityError
-from django.test import TestCase
-from django.urls import reverse
-
-from .models import Criteria, Project, ProjectInvitation, Visit, VisitAssessment
+from django.contrib.messages import get_messages
+from django.core import signing
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+
+from .models import (
+    Criteria,
+    Project,
+    ProjectInvitation,
+    Realtor,
+    Visit,
+    VisitAssessment,
+)
+from .views import (
+    VISIT_WIZARD_COOKIE,
+    VISIT_WIZARD_SALT,
+    _memoized_value_formatter,
+    format_assessment_value,
+)
 
 
 class ProjectModelTest(TestCase):
@@ -31,17 +51,36 @@ class ProjectModelTest(TestCase):
         self.assertEqual(project.status, "finished")
         self.assertIsNotNone(project.finished_at)
 
-    def test_project_membership(self):
-        project = Project.objects.create(name="Test Project", owner=self.user)
-        project.collaborators.add(self.collaborator)
+    def test_for_member(self):
+        owned = Project.objects.create(name="Owned", owner=self.user)
+        # Also listed as a collaborator on their own project
+        owned.collaborators.add(self.user, self.collaborator)
+        shared = Project.objects.create(name="Shared", owner=self.collaborator)
+        shared.collaborators.add(self.user)
+        Project.objects.create(name="Unrelated", owner=self.collaborator)
 
-        self.assertTrue(project.is_member(self.user))
-        self.assertTrue(project.is_member(self.collaborator))
+        self.assertQuerySetEqual(
+            Project.objects.for_member(self.user).order_by("name"),
+            [owned, shared],
+        )
 
+    def test_with_criteria_count_for_member(self):
+        project = Project.objects.create(name="Test Project", owner=self.user)
         other_user = User.objects.create_user(
             username="other", email="other@example.com", password="testpass123"
         )
-        self.assertFalse(project.is_member(other_user))
+        project.collaborators.add(self.collaborator, other_user)
+        Criteria.objects.create(project=project, name="Price", order=1)
+        Criteria.objects.create(project=project, name="Location", order=2)
+
+        for user in (self.user, self.collaborator):
+            with self.subTest(user=user.username):
+                project = (
+                    Project.objects.with_criteria_count()
+                    .for_member(user)
+                    .get(pk=project.pk)
+                )
+                self.assertEqual(project.criteria_count, 2)
 
 
 class CriteriaModelTest(TestCase):
@@ -70,9 +109,10 @@ class CriteriaModelTest(TestCase):
         )
 
         with self.assertRaises(IntegrityError):
-            Criteria.objects.create(
-                project=self.project, name="Duplicate Name", type="text"
-            )
+            with transaction.atomic():
+                Criteria.objects.create(
+                    project=self.project, name="Duplicate Name", type="text"
+                )
 
 
 class VisitModelTest(TestCase):
@@ -114,9 +154,9 @@ class VisitAssessmentModelTest(TestCase):
         criteria = Criteria.objects.create(
             project=self.project, name="Has Parking", type="boolean"
         )
-        assessment = VisitAssessment.objects.create(visit=self.visit, criteria=criteria)
-        assessment.set_value(True)
-        assessment.save()
+        assessment = VisitAssessment.objects.create(
+            visit=self.visit, criteria=criteria, value_boolean=True
+        )
 
         self.assertTrue(assessment.get_value())
         self.assertTrue(assessment.value_boolean)
@@ -136,9 +176,9 @@ class VisitAssessmentModelTest(TestCase):
         criteria = Criteria.objects.create(
             project=self.project, name="Overall Rating", type="rating"
         )
-        assessment = VisitAssessment.objects.create(visit=self.visit, criteria=criteria)
-        assessment.set_value(4)
-        assessment.save()
+        assessment = VisitAssessment.objects.create(
+            visit=self.visit, criteria=criteria, value_rating=4
+        )
 
         self.assertEqual(assessment.get_value(), 4)
         self.assertEqual(assessment.value_rating, 4)
@@ -147,9 +187,9 @@ class VisitAssessmentModelTest(TestCase):
         criteria = Criteria.objects.create(
             project=self.project, name="Notes", type="text"
         )
-        assessment = VisitAssessment.objects.create(visit=self.visit, criteria=criteria)
-        assessment.set_value("Great location")
-        assessment.save()
+        assessment = VisitAssessment.objects.create(
+            visit=self.visit, criteria=criteria, value_text="Great location"
+        )
 
         self.assertEqual(assessment.get_value(), "Great location")
         self.assertEqual(assessment.value_text, "Great location")
@@ -162,7 +202,8 @@ class VisitAssessmentModelTest(TestCase):
         VisitAssessment.objects.create(visit=self.visit, criteria=criteria)
 
         with self.assertRaises(IntegrityError):
-            VisitAssessment.objects.create(visit=self.visit, criteria=criteria)
+            with transaction.atomic():
+                VisitAssessment.objects.create(visit=self.visit, criteria=criteria)
 
 
 class ProjectInvitationModelTest(TestCase):
@@ -203,11 +244,12 @@ class ProjectInvitationModelTest(TestCase):
         )
 
         with self.assertRaises(IntegrityError):
-            ProjectInvitation.objects.create(
-                project=self.project,
-                email="duplicate@example.com",
-                invited_by=self.user,
-            )
+            with transaction.atomic():
+                ProjectInvitation.objects.create(
+                    project=self.project,
+                    email="duplicate@example.com",
+                    invited_by=self.user,
+                )
 
 
 class ProjectManagementViewTest(TestCase):
@@ -230,6 +272,54 @@ class ProjectManagementViewTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Test Project")
 
+    def test_project_list_view_newest_first(self):
+        newer = Project.objects.create(name="Newer Project", owner=self.user)
+        Project.objects.filter(pk=self.project.pk).update(
+            created_at=newer.created_at - timedelta(days=1)
+        )
+        self.client.login(username="testuser", password="testpass123")
+        response = self.client.get("/projects/")
+        self.assertEqual(response.context["active_projects"], [newer, self.project])
+
+    def test_project_list_view_query_count(self):
+        projects = []
+        for i in range(5):
+            project = Project.objects.create(name=f"Project {i}", owner=self.user)
+            project.collaborators.add(self.collaborator)
+            Visit.objects.create(
+                project=project,
+                name=f"Property {i}",
+                address="123 Test St",
+                visit_date=date.today(),
+                created_by=self.user,
+            )
+            projects.append(project)
+        # Project 4 is the newest; projects 0 and 1 are finished, 0 most recently
+        now = self.project.created_at
+        for i, project in enumerate(projects):
+            Project.objects.filter(pk=project.pk).update(
+                created_at=now + timedelta(days=i + 1)
+            )
+        for i, project in enumerate(projects[:2]):
+            Project.objects.filter(pk=project.pk).update(
+                status="finished", finished_at=now + timedelta(days=10 - i)
+            )
+        self.client.force_login(self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/projects/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), 4)
+        self.assertContains(response, "2 members", count=6)
+        self.assertEqual(
+            response.context["active_projects"],
+            [projects[4], projects[3], projects[2], self.project],
+        )
+        self.assertEqual(
+            response.context["finished_projects"], [projects[0], projects[1]]
+        )
+
     def test_project_list_view_unauthenticated(self):
         response = self.client.get("/projects/")
         self.assertEqual(response.status_code, 302)  # Redirect to login
@@ -301,18 +391,78 @@ class ProjectCollaborationViewTest(TestCase):
         )
         self.project = Project.objects.create(name="Test Project", owner=self.user)
 
-    def test_send_invitation_owner(self):
+    @mock.patch(
+        "projects.views.EmailService.send_invitation_email",
+        return_value={"status": "success", "message": "Email sent successfully"},
+    )
+    def test_send_invitation_owner(self, send_invitation_email):
         self.client.login(username="testuser", password="testpass123")
         response = self.client.post(
             f"/projects/{self.project.pk}/invite/", {"email": "newuser@example.com"}
         )
         self.assertEqual(response.status_code, 302)
+        send_invitation_email.assert_called_once()
         self.assertTrue(
             ProjectInvitation.objects.filter(
                 project=self.project, email="newuser@example.com"
             ).exists()
         )
 
+    def test_send_invitation_existing_member(self):
+        self.project.collaborators.add(self.collaborator)
+        self.client.login(username="testuser", password="testpass123")
+        for email in (self.collaborator.email, self.user.email):
+            with self.subTest(email=email):
+                response = self.client.post(
+                    f"/projects/{self.project.pk}/invite/", {"email": email}
+                )
+                self.assertEqual(response.status_code, 302)
+                self.assertFalse(
+                    ProjectInvitation.objects.filter(
+                        project=self.project, email=email
+                    ).exists()
+                )
+
+    def test_send_invitation_already_invited(self):
+        ProjectInvitation.objects.create(
+            project=self.project, email="newuser@example.com", invited_by=self.user
+        )
+        self.client.login(username="testuser", password="testpass123")
+        response = self.client.post(
+            f"/projects/{self.project.pk}/invite/", {"email": "newuser@example.com"}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            ProjectInvitation.objects.filter(
+                project=self.project, email="newuser@example.com"
+            ).count(),
+            1,
+        )
+        messages = [str(m) for m in get_messages(response.wsgi_request)]
+        self.assertIn(
+            "An invitation has already been sent to newuser@example.com.", messages
+        )
+
+    def test_send_invitation_email_failure(self):
+        self.client.login(username="testuser", password="testpass123")
+        # Mailgun isn't configured in tests, so the email is skipped
+        with self.settings(MAILGUN_API_KEY=""):
+            response = self.client.post(
+                f"/projects/{self.project.pk}/invite/",
+                {"email": "newuser@example.com"},
+            )
+        self.assertEqual(response.status_code, 302)
+        # The owner is told and can invite the same address again
+        self.assertFalse(
+            ProjectInvitation.objects.filter(
+                project=self.project, email="newuser@example.com"
+            ).exists()
+        )
+        self.assertEqual(
+            [str(m) for m in get_messages(response.wsgi_request)],
+            ["Failed to send invitation email: Email settings not configured"],
+        )
+
     def test_send_invitation_collaborator_denied(self):
         self.project.collaborators.add(self.collaborator)
         self.client.login(username="collaborator", password="testpass123")
@@ -339,6 +489,28 @@ class ProjectCollaborationViewTest(TestCase):
             self.project.collaborators.filter(id=self.collaborator.id).exists()
         )
 
+    def test_accept_invitation_short_token(self):
+        invitation = ProjectInvitation.objects.create(
+            project=self.project, email=self.collaborator.email, invited_by=self.user
+        )
+        self.assertEqual(len(invitation.token_str), 22)
+        self.assertEqual(
+            reverse(
+                "projects:accept_invitation", kwargs={"token": invitation.token_str}
+            ),
+            f"/projects/invitation/{invitation.token_str}/",
+        )
+        self.client.login(username="collaborator", password="testpass123")
+        response = self.client.get(f"/projects/invitation/{invitation.token_str}/")
+        self.assertEqual(response.status_code, 302)
+        invitation.refresh_from_db()
+        self.assertTrue(invitation.accepted)
+
+    def test_accept_invitation_unknown_short_token(self):
+        self.client.login(username="collaborator", password="testpass123")
+        response = self.client.get(f"/projects/invitation/{'A' * 22}/")
+        self.assertRedirects(response, "/", fetch_redirect_response=False)
+
     def test_accept_invitation_unauthenticated(self):
         invitation = ProjectInvitation.objects.create(
             project=self.project, email="newuser@example.com", invited_by=self.user
@@ -357,6 +529,22 @@ class ProjectCollaborationViewTest(TestCase):
             self.project.collaborators.filter(id=self.collaborator.id).exists()
         )
 
+    def test_remove_collaborator_not_a_collaborator(self):
+        self.client.login(username="testuser", password="testpass123")
+        response = self.client.post(
+            f"/projects/{self.project.pk}/remove/{self.collaborator.pk}/"
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            [str(m) for m in get_messages(response.wsgi_request)],
+            [f"{self.collaborator.email} is not a collaborator on this project."],
+        )
+
+    def test_remove_collaborator_unknown_user(self):
+        self.client.login(username="testuser", password="testpass123")
+        response = self.client.post(f"/projects/{self.project.pk}/remove/999999/")
+        self.assertEqual(response.status_code, 404)
+
     def test_cancel_invitation_owner(self):
         invitation = ProjectInvitation.objects.create(
             project=self.project, email="cancel@example.com", invited_by=self.user
@@ -368,6 +556,40 @@ class ProjectCollaborationViewTest(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertFalse(ProjectInvitation.objects.filter(pk=invitation.pk).exists())
 
+    def test_cancel_invitation_collaborator_denied(self):
+        self.project.collaborators.add(self.collaborator)
+        invitation = ProjectInvitation.objects.create(
+            project=self.project, email="cancel@example.com", invited_by=self.user
+        )
+        self.client.login(username="collaborator", password="testpass123")
+        self.client.post(
+            f"/projects/{self.project.pk}/cancel-invitation/{invitation.pk}/"
+        )
+        self.assertTrue(ProjectInvitation.objects.filter(pk=invitation.pk).exists())
+
+    def test_cancel_invitation_from_other_project(self):
+        other_project = Project.objects.create(name="Other Project", owner=self.user)
+        invitation = ProjectInvitation.objects.create(
+            project=other_project, email="cancel@example.com", invited_by=self.user
+        )
+        self.client.login(username="testuser", password="testpass123")
+        response = self.client.post(
+            f"/projects/{self.project.pk}/cancel-invitation/{invitation.pk}/"
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertTrue(ProjectInvitation.objects.filter(pk=invitation.pk).exists())
+
+
+class ProjectURLConfTest(SimpleTestCase):
+    def test_routes_registered_once(self):
+        resolver = get_resolver().namespace_dict["projects"][1]
+        names = [key for key in resolver.reverse_dict if isinstance(key, str)]
+        self.assertIn("comparison_table", names)
+        for name in names:
+            self.assertEqual(
+                len(resolver.reverse_dict.getlist(name)), 1, f"{name} is duplicated"
+            )
+
 
 class ProjectFormTest(TestCase):
     def test_valid_project_form(self):
@@ -417,6 +639,19 @@ class CriteriaManagementViewTest(TestCase):
         response = self.client.get(f"/projects/{self.project.pk}/criteria/")
         self.assertEqual(response.status_code, 200)
 
+    def test_criteria_list_view_collaborator(self):
+        self.client.login(username="collaborator", password="testpass123")
+        response = self.client.get(f"/projects/{self.project.pk}/criteria/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_criteria_list_view_non_member(self):
+        User.objects.create_user(
+            username="otheruser", email="other@example.com", password="testpass123"
+        )
+        self.client.login(username="otheruser", password="testpass123")
+        response = self.client.get(f"/projects/{self.project.pk}/criteria/")
+        self.assertRedirects(response, "/projects/", fetch_redirect_response=False)
+
     def test_criteria_create_view(self):
         self.client.login(username="testuser", password="testpass123")
         response = self.client.post(
@@ -426,6 +661,13 @@ class CriteriaManagementViewTest(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertTrue(Criteria.objects.filter(name="Test Criteria").exists())
 
+    def test_criteria_create_view_defaults_order_after_last(self):
+        Criteria.objects.create(project=self.project, name="Price", order=4)
+        self.client.login(username="testuser", password="testpass123")
+        response = self.client.get(f"/projects/{self.project.pk}/criteria/create/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["form"].initial["order"], 5)
+
     def test_add_default_criteria_view(self):
         self.client.login(username="testuser", password="testpass123")
         response = self.client.post(
@@ -435,6 +677,25 @@ class CriteriaManagementViewTest(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertTrue(self.project.criteria.count() > 0)
 
+    def test_add_default_criteria_skips_existing_names(self):
+        Criteria.objects.create(
+            project=self.project, name="Monthly Rent/Price", type="numeric"
+        )
+        self.client.login(username="testuser", password="testpass123")
+        url = f"/projects/{self.project.pk}/criteria/add-defaults/"
+        response = self.client.post(url, {"template": "basic_housing"})
+        count = self.project.criteria.count()
+        self.assertEqual(
+            self.project.criteria.filter(name="Monthly Rent/Price").count(), 1
+        )
+        self.assertEqual(
+            [str(m) for m in get_messages(response.wsgi_request)],
+            [f"Added {count - 1} criteria from template!"],
+        )
+
+        self.client.post(url, {"template": "basic_housing"})
+        self.assertEqual(self.project.criteria.count(), count)
+
 
 class VisitManagementViewTest(TestCase):
     def setUp(self):
@@ -472,6 +733,172 @@ class VisitManagementViewTest(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertIn("step=2", response.url)
 
+    def test_visit_create_wizard(self):
+        self.client.login(username="testuser", password="testpass123")
+        url = f"/projects/{self.project.pk}/visits/create/"
+        response = self.client.post(
+            url,
+            {
+                "name": "Test Property",
+                "address": "123 Test Street",
+                "visit_date": "2024-01-15",
+                "notes": "Test notes",
+            },
+        )
+        cookie = response.cookies["visit_wizard"]
+        self.assertEqual(cookie["path"], url)
+        self.assertTrue(cookie["httponly"])
+
+        response = self.client.get(url, {"step": "2"})
+        self.assertContains(response, "Jan 15, 2024")
+
+        response = self.client.post(
+            f"{url}?step=2", {f"criteria_{self.criteria.pk}": "1500"}
+        )
+        self.assertRedirects(response, f"{url}?step=3", fetch_redirect_response=False)
+        visit = Visit.objects.get(project=self.project)
+        self.assertEqual(visit.visit_date, date(2024, 1, 15))
+        self.assertEqual(visit.assessments.get().value_numeric, 1500)
+
+        response = self.client.post(f"{url}?step=3")
+        self.assertRedirects(
+            response,
+            f"/projects/{self.project.pk}/visits/{visit.pk}/",
+            fetch_redirect_response=False,
+        )
+        self.assertEqual(response.cookies["visit_wizard"].value, "")
+
+    def test_visit_detail_view(self):
+        visit = Visit.objects.create(
+            project=self.project,
+            name="Test Property",
+            address="123 Test St",
+            visit_date=date.today(),
+            created_by=self.user,
+        )
+        VisitAssessment.objects.create(
+            visit=visit, criteria=self.criteria, value_numeric=1500
+        )
+        self.client.force_login(self.user)
+        # Session user, project, visit, assessments, photos, criteria count
+        with self.assertNumQueries(6):
+            response = self.client.get(
+                f"/projects/{self.project.pk}/visits/{visit.pk}/"
+            )
+        self.assertContains(response, "Test Criteria")
+        self.assertContains(response, self.user.email)
+
+    def test_visit_create_step3_photo_types(self):
+        visit = Visit.objects.create(
+            project=self.project,
+            name="Test Property",
+            address="123 Test St",
+            visit_date=date.today(),
+            created_by=self.user,
+        )
+        self.client.login(username="testuser", password="testpass123")
+        self.client.cookies[VISIT_WIZARD_COOKIE] = signing.dumps(
+            {"visit_id": visit.pk}, salt=VISIT_WIZARD_SALT, compress=True
+        )
+        with (
+            tempfile.TemporaryDirectory() as media_root,
+            self.settings(MEDIA_ROOT=media_root),
+        ):
+            self.client.post(
+                f"/projects/{self.project.pk}/visits/create/?step=3",
+                {
+                    "photo_0": SimpleUploadedFile(
+                        "front.png", b"png", content_type="image/png"
+                    ),
+                    "photo_1": SimpleUploadedFile(
+                        "plan.svg", b"<svg/>", content_type="image/svg+xml"
+                    ),
+                },
+            )
+            self.assertEqual(
+                list(visit.photos.values_list("order", flat=True)),
+                [0],
+            )
+
+    def test_visit_create_step2_rejects_tampered_cookie(self):
+        self.client.login(username="testuser", password="testpass123")
+        self.client.cookies["visit_wizard"] = "tampered"
+        response = self.client.get(
+            f"/projects/{self.project.pk}/visits/create/", {"step": "2"}
+        )
+        self.assertRedirects(
+            response,
+            f"/projects/{self.project.pk}/visits/create/",
+            fetch_redirect_response=False,
+        )
+
+
+class RealtorManagementViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        self.collaborator = User.objects.create_user(
+            username="collaborator", email="collab@example.com", password="testpass123"
+        )
+        self.project = Project.objects.create(name="Test Project", owner=self.user)
+        self.project.collaborators.add(self.collaborator)
+        self.realtor = Realtor.objects.create(
+            project=self.project, name="Jane Agent", created_by=self.user
+        )
+
+    def test_realtor_list_view_collaborator(self):
+        self.client.login(username="collaborator", password="testpass123")
+        response = self.client.get(f"/projects/{self.project.pk}/realtors/")
+        self.assertContains(response, "Jane Agent")
+
+    def test_realtor_list_view_non_member(self):
+        User.objects.create_user(
+            username="otheruser", email="other@example.com", password="testpass123"
+        )
+        self.client.login(username="otheruser", password="testpass123")
+        response = self.client.get(f"/projects/{self.project.pk}/realtors/")
+        self.assertRedirects(response, "/projects/", fetch_redirect_response=False)
+
+    def test_realtor_create_duplicate_name(self):
+        self.client.login(username="testuser", password="testpass123")
+        response = self.client.post(
+            f"/projects/{self.project.pk}/realtors/create/", {"name": "Jane Agent"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response, "A realtor with this name already exists in this project."
+        )
+        self.assertEqual(Realtor.objects.filter(project=self.project).count(), 1)
+
+    def test_realtor_edit_keeps_own_name(self):
+        self.client.login(username="collaborator", password="testpass123")
+        response = self.client.post(
+            f"/projects/{self.project.pk}/realtors/{self.realtor.pk}/edit/",
+            {"name": "Jane Agent", "company": "Acme Realty"},
+        )
+        self.assertRedirects(
+            response,
+            f"/projects/{self.project.pk}/realtors/",
+            fetch_redirect_response=False,
+        )
+        self.realtor.refresh_from_db()
+        self.assertEqual(self.realtor.company, "Acme Realty")
+
+    def test_realtor_delete_by_collaborator_denied(self):
+        self.client.login(username="collaborator", password="testpass123")
+        self.client.post(
+            f"/projects/{self.project.pk}/realtors/{self.realtor.pk}/delete/"
+        )
+        self.assertTrue(Realtor.objects.filter(pk=self.realtor.pk).exists())
+
+    def test_realtor_delete_by_owner(self):
+        self.client.login(username="testuser", password="testpass123")
+        self.client.post(
+            f"/projects/{self.project.pk}/realtors/{self.realtor.pk}/delete/"
+        )
+        self.assertFalse(Realtor.objects.filter(pk=self.realtor.pk).exists())
+
 
 class CriteriaFormTest(TestCase):
     def test_valid_criteria_form(self):
@@ -494,6 +921,24 @@ class CriteriaFormTest(TestCase):
         self.assertFalse(form.is_valid())
         self.assertIn("name", form.errors)
 
+    def test_invalid_criteria_form_duplicate_name(self):
+        from projects.forms import CriteriaForm
+
+        user = User.objects.create_user(
+            username="testuser", email="test@example.com", password="testpass123"
+        )
+        project = Project.objects.create(name="Test Project", owner=user)
+        existing = Criteria.objects.create(project=project, name="Price", order=1)
+        form_data = {"name": "Price", "type": "numeric", "weight": 1.0, "order": 2}
+
+        form = CriteriaForm(data=form_data, project=project)
+        self.assertFalse(form.is_valid())
+        self.assertIn("name", form.errors)
+
+        # Keeping its own name when editing is fine
+        form = CriteriaForm(data=form_data, instance=existing, project=project)
+        self.assertTrue(form.is_valid())
+
 
 class VisitFormTest(TestCase):
     def test_valid_visit_form(self):
@@ -575,26 +1020,58 @@ class VisitAssessmentFormTest(TestCase):
         )
         self.assertEqual(numeric_assessment.get_value(), 1500.00)
 
+    def test_assessment_form_save_updates_existing(self):
+        from projects.forms import VisitAssessmentForm
+
+        visit = Visit.objects.create(
+            project=self.project,
+            name="Test Property",
+            address="123 Test St",
+            visit_date=date.today(),
+            created_by=self.user,
+        )
+        existing = VisitAssessment.objects.create(
+            visit=visit, criteria=self.numeric_criteria, value_numeric=1000
+        )
+
+        form = VisitAssessmentForm(
+            self.project,
+            data={
+                f"criteria_{self.boolean_criteria.id}": True,
+                f"criteria_{self.numeric_criteria.id}": 1500.00,
+            },
+        )
+        self.assertTrue(form.is_valid())
+        # Existing assessments, then one INSERT and one UPDATE (plus savepoint)
+        with self.assertNumQueries(5):
+            form.save_assessments(visit)
+
+        existing.refresh_from_db()
+        self.assertEqual(existing.value_numeric, 1500)
+        self.assertGreater(existing.updated_at, existing.created_at)
+        self.assertEqual(visit.assessments.count(), 2)
+
 
 class ComparisonViewTest(TestCase):
     """Test comparison table and export functionality."""
 
-    def setUp(self):
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username="comparisonuser",
             email="comparison@example.com",
             password="testpass123",
         )
-        self.project = Project.objects.create(
-            name="Test Housing Project", owner=self.user
+        cls.project = Project.objects.create(
+            name="Test Housing Project", owner=cls.user
         )
 
         # Create test criteria
-        self.criteria1 = Criteria.objects.create(
-            project=self.project, name="Price", type="numeric", weight=2.0, order=1
+        cls.criteria1 = Criteria.objects.create(
+            project=cls.project, name="Price", type="numeric", weight=2.0, order=1
         )
-        self.criteria2 = Criteria.objects.create(
-            project=self.project,
+        cls.criteria2 = Criteria.objects.create(
+            project=cls.project,
             name="Location Rating",
             type="rating",
             weight=1.5,
@@ -602,51 +1079,53 @@ class ComparisonViewTest(TestCase):
         )
 
         # Create test visits
-        self.visit1 = Visit.objects.create(
-            project=self.project,
+        cls.visit1 = Visit.objects.create(
+            project=cls.project,
             name="House A",
             address="123 Main St",
             visit_date="2024-01-15",
-            created_by=self.user,
+            created_by=cls.user,
         )
-        self.visit2 = Visit.objects.create(
-            project=self.project,
+        cls.visit2 = Visit.objects.create(
+            project=cls.project,
             name="House B",
             address="456 Oak Ave",
             visit_date="2024-01-20",
-            created_by=self.user,
+            created_by=cls.user,
         )
 
         # Create test assessments
-        assessment1 = VisitAssessment.objects.create(
-            visit=self.visit1, criteria=self.criteria1
+        VisitAssessment.objects.create(
+            visit=cls.visit1, criteria=cls.criteria1, value_numeric=250000
         )
-        assessment1.set_value(250000)
-        assessment1.save()
-
-        assessment2 = VisitAssessment.objects.create(
-            visit=self.visit1, criteria=self.criteria2
+        VisitAssessment.objects.create(
+            visit=cls.visit1, criteria=cls.criteria2, value_rating=4
         )
-        assessment2.set_value(4)
-        assessment2.save()
-
-        assessment3 = VisitAssessment.objects.create(
-            visit=self.visit2, criteria=self.criteria1
+        VisitAssessment.objects.create(
+            visit=cls.visit2, criteria=cls.criteria1, value_numeric=300000
+        )
+        VisitAssessment.objects.create(
+            visit=cls.visit2, criteria=cls.criteria2, value_rating=3
         )
-        assessment3.set_value(300000)
-        assessment3.save()
 
-        assessment4 = VisitAssessment.objects.create(
-            visit=self.visit2, criteria=self.criteria2
+        # Project with a visit but no criteria
+        cls.project_no_criteria = Project.objects.create(
+            name="No Criteria Project", owner=cls.user
+        )
+        Visit.objects.create(
+            project=cls.project_no_criteria,
+            name="Test Visit",
+            address="123 Test St",
+            visit_date="2024-01-15",
+            created_by=cls.user,
         )
-        assessment4.set_value(3)
-        assessment4.save()
 
-        self.client.login(username="comparisonuser", password="testpass123")
+    def setUp(self):
+        self.client.force_login(self.user)
 
     def test_comparison_table_view(self):
         """Test comparison table view."""
-        url = reverse("projects:comparison_table", kwargs={"pk": self.project.pk})
+        url = f"/projects/{self.project.pk}/compare/"
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Property Comparison")
@@ -657,22 +1136,102 @@ class ComparisonViewTest(TestCase):
 
     def test_comparison_table_sorting(self):
         """Test comparison table sorting functionality."""
-        url = reverse("projects:comparison_table", kwargs={"pk": self.project.pk})
+        url = f"/projects/{self.project.pk}/compare/"
         response = self.client.get(url, {"sort": self.criteria1.id, "order": "asc"})
         self.assertEqual(response.status_code, 200)
         # Should contain sorted data
         self.assertContains(response, "House A")
         self.assertContains(response, "House B")
 
+    def test_comparison_table_sorting_order(self):
+        """Test sorting by a numeric criterion, with missing values last."""
+        Visit.objects.create(
+            project=self.project,
+            name="House C",
+            address="789 Pine Rd",
+            visit_date="2024-01-25",
+            created_by=self.user,
+        )
+        url = f"/projects/{self.project.pk}/compare/"
+        for order, expected in (
+            ("asc", ["House A", "House B", "House C"]),
+            ("desc", ["House B", "House A", "House C"]),
+        ):
+            with self.subTest(order=order):
+                response = self.client.get(
+                    url, {"sort": self.criteria1.id, "order": order}
+                )
+                self.assertEqual(
+                    [
+                        item["visit"].name
+                        for item in response.context["comparison_data"]
+                    ],
+                    expected,
+                )
+
     def test_comparison_table_filtering(self):
         """Test comparison table filtering functionality."""
-        url = reverse("projects:comparison_table", kwargs={"pk": self.project.pk})
+        url = f"/projects/{self.project.pk}/compare/"
         response = self.client.get(
             url, {"filter_criterion": self.criteria1.id, "filter_value": "250000"}
         )
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "House A")
 
+    def test_comparison_table_criteria_stats(self):
+        """Test the numeric range used for color coding."""
+        response = self.client.get(f"/projects/{self.project.pk}/compare/")
+        stats = response.context["criteria_stats"]
+        self.assertEqual(stats[self.criteria1.id]["min_val"], 250000.0)
+        self.assertEqual(stats[self.criteria1.id]["max_val"], 300000.0)
+        self.assertEqual(stats[self.criteria2.id]["min_val"], 3.0)
+        self.assertEqual(stats[self.criteria2.id]["max_val"], 4.0)
+
+    def test_comparison_table_query_count_independent_of_visits(self):
+        """Test the comparison table doesn't query per visit."""
+        url = f"/projects/{self.project.pk}/compare/"
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(url)
+
+        realtor = Realtor.objects.create(
+            project=self.project, name="Jane Agent", created_by=self.user
+        )
+        for i in range(3):
+            visit = Visit.objects.create(
+                project=self.project,
+                name=f"Extra House {i}",
+                address=f"{i} Elm St",
+                visit_date="2024-02-01",
+                realtor=realtor,
+                created_by=self.user,
+            )
+            VisitAssessment.objects.create(
+                visit=visit, criteria=self.criteria1, value_numeric=100000 + i
+            )
+
+        with self.assertNumQueries(len(baseline)):
+            response = self.client.get(url)
+        self.assertContains(response, "Jane Agent")
+
+    def test_memoized_value_formatter_matches_format_assessment_value(self):
+        """Test the per-request formatter returns the same display values."""
+        format_value = _memoized_value_formatter()
+        cases = [
+            (None, "numeric"),
+            (True, "boolean"),
+            (False, "boolean"),
+            (4, "rating"),
+            (Decimal("250000.00"), "numeric"),
+            (Decimal("12.50"), "numeric"),
+            ("Quiet street", "text"),
+        ]
+        for _ in range(2):
+            for value, criteria_type in cases:
+                self.assertEqual(
+                    format_value(value, criteria_type),
+                    format_assessment_value(value, criteria_type),
+                )
+
     def test_csv_export(self):
         """Test CSV export functionality."""
         url = reverse("projects:export_csv", kwargs={"pk": self.project.pk})
@@ -681,10 +1240,38 @@ class ComparisonViewTest(TestCase):
         self.assertEqual(response["Content-Type"], "text/csv")
         self.assertIn("attachment", response["Content-Disposition"])
         # Check CSV content
-        content = response.content.decode("utf-8")
+        content = b"".join(response.streaming_content).decode("utf-8")
         self.assertIn("House A", content)
         self.assertIn("House B", content)
         self.assertIn("Price", content)
+        self.assertIn("House A,123 Main St,2024-01-15,,,250000,4/5", content)
+
+    def test_csv_export_query_count_independent_of_visits(self):
+        """Test the CSV export doesn't query per visit or per assessment."""
+        url = reverse("projects:export_csv", kwargs={"pk": self.project.pk})
+
+        def export():
+            response = self.client.get(url)
+            return b"".join(response.streaming_content).decode("utf-8")
+
+        with CaptureQueriesContext(connection) as baseline:
+            export()
+
+        for i in range(3):
+            visit = Visit.objects.create(
+                project=self.project,
+                name=f"Extra House {i}",
+                address=f"{i} Elm St",
+                visit_date="2024-02-01",
+                created_by=self.user,
+            )
+            VisitAssessment.objects.create(
+                visit=visit, criteria=self.criteria2, value_rating=5
+            )
+
+        with self.assertNumQueries(len(baseline)):
+            content = export()
+        self.assertIn("Extra House 2,2 Elm St,2024-02-01,,,-,5/5", content)
 
     def test_comparison_unauthorized_access(self):
         """Test unauthorized access to comparison table."""
@@ -695,35 +1282,29 @@ class ComparisonViewTest(TestCase):
         )
         self.client.login(username="otherusercomp", password="testpass123")
 
-        url = reverse("projects:comparison_table", kwargs={"pk": self.project.pk})
+        url = f"/projects/{self.project.pk}/compare/"
         response = self.client.get(url)
-        self.assertEqual(response.status_code, 302)  # Redirect to projects list
+        self.assertRedirects(response, "/projects/", fetch_redirect_response=False)
 
     def test_comparison_no_visits(self):
         """Test comparison table with no visits."""
         # Create empty project
         empty_project = Project.objects.create(name="Empty Project", owner=self.user)
 
-        url = reverse("projects:comparison_table", kwargs={"pk": empty_project.pk})
+        url = f"/projects/{empty_project.pk}/compare/"
         response = self.client.get(url)
-        self.assertEqual(response.status_code, 302)  # Redirect to visit list
+        self.assertRedirects(
+            response,
+            f"/projects/{empty_project.pk}/visits/",
+            fetch_redirect_response=False,
+        )
 
     def test_comparison_no_criteria(self):
         """Test comparison table with no criteria."""
-        # Create project with visits but no criteria
-        project_no_criteria = Project.objects.create(
-            name="No Criteria Project", owner=self.user
-        )
-        Visit.objects.create(
-            project=project_no_criteria,
-            name="Test Visit",
-            address="123 Test St",
-            visit_date="2024-01-15",
-            created_by=self.user,
-        )
-
-        url = reverse(
-            "projects:comparison_table", kwargs={"pk": project_no_criteria.pk}
-        )
+        url = f"/projects/{self.project_no_criteria.pk}/compare/"
         response = self.client.get(url)
-        self.assertEqual(response.status_code, 302)  # Redirect to criteria list
+        self.assertRedirects(
+            response,
+            f"/projects/{self.project_no_criteria.pk}/criteria/",
+            fetch_redirect_response=False,
+        )
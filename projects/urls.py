@@ -1,70 +1,88 @@
-from django.urls import path
+from django.urls import include, path, register_converter
 
 from . import views
+from .converters import TokenConverter
 
 app_name = "projects"
 
-urlpatterns = [
+register_converter(TokenConverter, "token")
+
+# Routes under a single project, i.e. /projects/<pk>/...; grouping them behind
+# one include() lets the resolver skip the whole block with a single prefix
+# check for URLs that aren't project-scoped.
+project_patterns = [
     # Project management
-    path("", views.project_list, name="list"),
-    path("create/", views.project_create, name="create"),
-    path("<int:pk>/", views.project_detail, name="detail"),
-    path("<int:pk>/edit/", views.project_edit, name="edit"),
-    path("<int:pk>/finish/", views.project_finish, name="finish"),
-    path("<int:pk>/invite/", views.send_invitation, name="send_invitation"),
+    path("", views.project_detail, name="detail"),
+    path("edit/", views.project_edit, name="edit"),
+    path("finish/", views.project_finish, name="finish"),
+    path("invite/", views.send_invitation, name="send_invitation"),
     path(
-        "<int:pk>/remove/<int:user_id>/",
+        "remove/<int:user_id>/",
         views.remove_collaborator,
         name="remove_collaborator",
     ),
     path(
-        "<int:pk>/cancel-invitation/<int:invitation_id>/",
+        "cancel-invitation/<int:invitation_id>/",
         views.cancel_invitation,
         name="cancel_invitation",
     ),
-    path("invitation/<uuid:token>/", views.accept_invitation, name="accept_invitation"),
     # Criteria management
-    path("<int:pk>/criteria/", views.criteria_list, name="criteria_list"),
-    path("<int:pk>/criteria/create/", views.criteria_create, name="criteria_create"),
+    path("criteria/", views.criteria_list, name="criteria_list"),
+    path("criteria/create/", views.criteria_create, name="criteria_create"),
     path(
-        "<int:pk>/criteria/<int:criteria_id>/edit/",
+        "criteria/<int:criteria_id>/edit/",
         views.criteria_edit,
         name="criteria_edit",
     ),
     path(
-        "<int:pk>/criteria/<int:criteria_id>/delete/",
+        "criteria/<int:criteria_id>/delete/",
         views.criteria_delete,
         name="criteria_delete",
     ),
     path(
-        "<int:pk>/criteria/add-defaults/",
+        "criteria/add-defaults/",
         views.add_default_criteria,
         name="add_default_criteria",
     ),
     # Visit management
-    path("<int:pk>/visits/", views.visit_list, name="visit_list"),
-    path("<int:pk>/visits/create/", views.visit_create, name="visit_create"),
-    path("<int:pk>/visits/<int:visit_id>/", views.visit_detail, name="visit_detail"),
-    path("<int:pk>/visits/<int:visit_id>/edit/", views.visit_edit, name="visit_edit"),
+    path("visits/", views.visit_list, name="visit_list"),
+    path("visits/create/", views.visit_create, name="visit_create"),
+    path("visits/<int:visit_id>/", views.visit_detail, name="visit_detail"),
+    path("visits/<int:visit_id>/edit/", views.visit_edit, name="visit_edit"),
     path(
-        "<int:pk>/visits/<int:visit_id>/delete/",
+        "visits/<int:visit_id>/delete/",
         views.visit_delete,
         name="visit_delete",
     ),
     # Realtor management
-    path("<int:pk>/realtors/", views.realtor_list, name="realtor_list"),
-    path("<int:pk>/realtors/create/", views.realtor_create, name="realtor_create"),
+    path("realtors/", views.realtor_list, name="realtor_list"),
+    path("realtors/create/", views.realtor_create, name="realtor_create"),
     path(
-        "<int:pk>/realtors/<int:realtor_id>/edit/",
+        "realtors/<int:realtor_id>/edit/",
         views.realtor_edit,
         name="realtor_edit",
     ),
     path(
-        "<int:pk>/realtors/<int:realtor_id>/delete/",
+        "realtors/<int:realtor_id>/delete/",
         views.realtor_delete,
         name="realtor_delete",
     ),
     # Comparison and export
-    path("<int:pk>/compare/", views.comparison_table, name="comparison_table"),
-    path("<int:pk>/export/csv/", views.export_csv, name="export_csv"),
+    path("compare/", views.comparison_table, name="comparison_table"),
+    path("export/csv/", views.export_csv, name="export_csv"),
 ]
+
+urlpatterns = (
+    path("", views.project_list, name="list"),
+    path("create/", views.project_create, name="create"),
+    path(
+        "invitation/<token:token>/", views.accept_invitation, name="accept_invitation"
+    ),
+    # Hyphenated UUID links sent in invitation emails before the short tokens.
+    path(
+        "invitation/<uuid:token>/",
+        views.accept_invitation,
+        name="accept_invitation_uuid",
+    ),
+    path("<int:pk>/", include(project_patterns)),
+)
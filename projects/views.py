@@ -1,18 +1,21 @@
 import csv
 import logging
-from datetime import datetime
+from collections import defaultdict
+from datetime import date
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.db import models
-from django.db.models import Q
-from django.http import HttpResponse
+from django.core import signing
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 
 from .forms import (
+    ALLOWED_PHOTO_CONTENT_TYPES,
     CriteriaForm,
     DefaultCriteriaForm,
     ProjectForm,
@@ -21,29 +24,112 @@ from .forms import (
     VisitAssessmentForm,
     VisitForm,
 )
-from .models import Criteria, Project, ProjectInvitation, Realtor, Visit, VisitPhoto
+from .models import (
+    Criteria,
+    Project,
+    ProjectInvitation,
+    Realtor,
+    Visit,
+    VisitAssessment,
+    VisitPhoto,
+)
 from .services import EmailService
 
 logger = logging.getLogger(__name__)
 
 
+# Enough of a project for the owner-only actions, which check ownership and
+# status and show the name
+PROJECT_SUMMARY_FIELDS = ("id", "name", "owner", "status")
+
+# The criteria columns the comparison table and CSV export actually read
+COMPARISON_CRITERIA_FIELDS = ("id", "name", "type", "weight", "order")
+
+# The assessment columns needed to read a value; the criteria themselves are
+# attached from the already loaded list (see _get_assessments_by_criteria)
+COMPARISON_ASSESSMENT_FIELDS = (
+    "id",
+    "visit",
+    "criteria",
+    "value_text",
+    "value_numeric",
+    "value_boolean",
+    "value_rating",
+)
+
+# The assessment column holding the value for each criteria type, as read by
+# VisitAssessment.get_value()
+ASSESSMENT_VALUE_FIELDS = {
+    "boolean": "value_boolean",
+    "numeric": "value_numeric",
+    "rating": "value_rating",
+    "text": "value_text",
+}
+
+
+def _get_project_for_member(request, pk, queryset=None):
+    """
+    Fetch a project the current user owns or collaborates on, in one query.
+
+    Returns None when the project doesn't exist or the user isn't a member,
+    so callers can show their usual "no access" response. The returned
+    project has ``_is_owner`` set for the current user.
+    """
+    if queryset is None:
+        queryset = Project.objects.all()
+    project = (
+        queryset.for_member(request.user).select_related("owner").filter(pk=pk).first()
+    )
+    if project is not None:
+        project._is_owner = project.owner_id == request.user.pk
+    return project
+
+
+def _save_unique_name(form, save, noun):
+    """
+    Call save(), reporting a duplicate name on the form instead of raising.
+
+    The form checks the name is unique, but the same name can be added by
+    another request before this one saves. Returns True if the save worked.
+    """
+    try:
+        save()
+    except IntegrityError:
+        form.add_error(
+            "name", f"A {noun} with this name already exists in this project."
+        )
+        return False
+    return True
+
+
 @login_required
 def project_list(request):
     """Display list of user's projects."""
-    # Get projects where user is owner or collaborator using Q objects
-
-    user_projects = Project.objects.filter(
-        Q(owner=request.user) | Q(collaborators=request.user)
-    ).distinct()
+    # Get projects where user is owner or collaborator in a single query, with
+    # the member and visit counts the cards show computed in SQL
+    projects = list(
+        Project.objects.for_member(request.user)
+        .select_related("owner")
+        .annotate(
+            collaborator_count=models.Count("collaborators", distinct=True),
+            visit_count=models.Count("visits", distinct=True),
+        )
+        # The aggregate drops Meta.ordering, so order newest first explicitly
+        .order_by("-created_at")
+    )
 
     # Separate active and finished projects
-    active_projects = user_projects.filter(status="active").order_by("-created_at")
-    finished_projects = user_projects.filter(status="finished").order_by("-finished_at")
+    active_projects = [p for p in projects if p.status == "active"]
+    finished_projects = sorted(
+        (p for p in projects if p.status == "finished"),
+        key=lambda p: (p.finished_at is not None, p.finished_at),
+        reverse=True,
+    )
 
     context = {
         "active_projects": active_projects,
         "finished_projects": finished_projects,
-        "has_projects": user_projects.exists(),
+        "has_projects": bool(projects),
     }
     return render(request, "projects/list.html", context)
 
@@ -68,26 +154,32 @@ def project_create(request):
 @login_required
 def project_detail(request, pk):
     """Display project details and management interface."""
-    project = get_object_or_404(Project, pk=pk)
-
     # Check if user has access to this project
-    if not project.is_member(request.user):
+    project = _get_project_for_member(
+        request,
+        pk,
+        Project.objects.with_related().prefetch_related(
+            "criteria",
+            models.Prefetch(
+                "invitations",
+                queryset=ProjectInvitation.objects.filter(accepted=False),
+                to_attr="pending_invitations_list",
+            ),
+        ),
+    )
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
-    # Get pending invitations (only for project owner)
-    pending_invitations = []
-    if request.user == project.owner:
-        pending_invitations = project.invitations.filter(accepted=False)
+    # Pending invitations are only shown to the project owner
+    is_owner = project._is_owner
 
     context = {
         "project": project,
-        "is_owner": request.user == project.owner,
-        "pending_invitations": pending_invitations,
+        "is_owner": is_owner,
+        "pending_invitations": project.pending_invitations_list if is_owner else [],
         "collaborators": project.collaborators.all(),
-        "invitation_form": (
-            ProjectInvitationForm() if request.user == project.owner else None
-        ),
+        "invitation_form": ProjectInvitationForm() if is_owner else None,
     }
     return render(request, "projects/detail.html", context)
 
@@ -98,7 +190,7 @@ def project_edit(request, pk):
     project = get_object_or_404(Project, pk=pk)
 
     # Only owner can edit project
-    if request.user != project.owner:
+    if request.user.pk != project.owner_id:
         messages.error(request, "Only the project owner can edit project details.")
         return redirect("projects:detail", pk=project.pk)
 
@@ -123,10 +215,10 @@ def project_edit(request, pk):
 @require_http_methods(["POST"])
 def project_finish(request, pk):
     """Mark project as finished."""
-    project = get_object_or_404(Project, pk=pk)
+    project = get_object_or_404(Project.objects.only(*PROJECT_SUMMARY_FIELDS), pk=pk)
 
     # Only owner can finish project
-    if request.user != project.owner:
+    if request.user.pk != project.owner_id:
         messages.error(request, "Only the project owner can finish projects.")
         return redirect("projects:detail", pk=project.pk)
 
@@ -146,10 +238,10 @@ def project_finish(request, pk):
 @require_http_methods(["POST"])
 def send_invitation(request, pk):
     """Send invitation to collaborate on project."""
-    project = get_object_or_404(Project, pk=pk)
+    project = get_object_or_404(Project.objects.only(*PROJECT_SUMMARY_FIELDS), pk=pk)
 
     # Only owner can send invitations
-    if request.user != project.owner:
+    if request.user.pk != project.owner_id:
         messages.error(request, "Only the project owner can send invitations.")
         return redirect("projects:detail", pk=project.pk)
 
@@ -162,23 +254,31 @@ def send_invitation(request, pk):
     if form.is_valid():
         email = form.cleaned_data["email"]
 
-        # Check if user is already a member
-        try:
-            user = User.objects.get(email=email)
-            if project.is_member(user):
-                messages.warning(
-                    request, f"{email} is already a member of this project."
-                )
-                return redirect("projects:detail", pk=project.pk)
-        except User.DoesNotExist:
-            pass
+        # Check for an existing collaborator and a pending invitation in one
+        # query
+        is_collaborator, already_invited = (
+            Project.objects.filter(pk=project.pk)
+            .annotate(
+                is_collaborator=models.Exists(
+                    project.collaborators.filter(email=email)
+                ),
+                already_invited=models.Exists(
+                    ProjectInvitation.objects.filter(
+                        project=project, email=email, accepted=False
+                    )
+                ),
+            )
+            .values_list("is_collaborator", "already_invited")
+            .get()
+        )
 
-        # Check if invitation already exists
-        existing_invitation = ProjectInvitation.objects.filter(
-            project=project, email=email, accepted=False
-        ).first()
+        # Check if user is already a member; only the owner gets this far
+        if email == request.user.email or is_collaborator:
+            messages.warning(request, f"{email} is already a member of this project.")
+            return redirect("projects:detail", pk=project.pk)
 
-        if existing_invitation:
+        # Check if invitation already exists
+        if already_invited:
             messages.warning(
                 request, f"An invitation has already been sent to {email}."
             )
@@ -193,7 +293,8 @@ def send_invitation(request, pk):
         try:
             invitation_url = request.build_absolute_uri(
                 reverse(
-                    "projects:accept_invitation", kwargs={"token": invitation.token}
+                    "projects:accept_invitation",
+                    kwargs={"token": invitation.token_str},
                 )
             )
 
@@ -221,7 +322,7 @@ def send_invitation(request, pk):
             messages.error(
                 request, "Failed to send invitation email. Please try again."
             )
-            logger.error(f"Failed to send invitation email: {e}")
+            logger.error("Failed to send invitation email: %s", e)
 
     else:
         for field, errors in form.errors.items():
@@ -233,8 +334,12 @@ def send_invitation(request, pk):
 
 def accept_invitation(request, token):
     """Accept project invitation."""
+    if isinstance(token, str):
+        token = ProjectInvitation.token_from_str(token)
     try:
-        invitation = ProjectInvitation.objects.get(token=token, accepted=False)
+        invitation = ProjectInvitation.objects.select_related("project").get(
+            token=token, accepted=False
+        )
     except ProjectInvitation.DoesNotExist:
         messages.error(request, "Invalid or expired invitation link.")
         return redirect("home")
@@ -258,7 +363,9 @@ def accept_invitation(request, token):
     else:
         # User not logged in, redirect to login with next parameter
         login_url = reverse("account_login")
-        invitation_url = reverse("projects:accept_invitation", kwargs={"token": token})
+        invitation_url = reverse(
+            "projects:accept_invitation", kwargs={"token": invitation.token_str}
+        )
         return redirect(f"{login_url}?next={invitation_url}")
 
 
@@ -266,11 +373,10 @@ def accept_invitation(request, token):
 @require_http_methods(["POST"])
 def remove_collaborator(request, pk, user_id):
     """Remove collaborator from project."""
-    project = get_object_or_404(Project, pk=pk)
-    collaborator = get_object_or_404(User, pk=user_id)
+    project = get_object_or_404(Project.objects.only(*PROJECT_SUMMARY_FIELDS), pk=pk)
 
     # Only owner can remove collaborators
-    if request.user != project.owner:
+    if request.user.pk != project.owner_id:
         messages.error(request, "Only the project owner can remove collaborators.")
         return redirect("projects:detail", pk=project.pk)
 
@@ -279,16 +385,17 @@ def remove_collaborator(request, pk, user_id):
         messages.error(request, "Cannot modify finished projects.")
         return redirect("projects:detail", pk=project.pk)
 
-    # Remove collaborator
-    if project.collaborators.filter(pk=user_id).exists():
-        project.collaborators.remove(collaborator)
-        messages.success(
-            request, f"{collaborator.email} has been removed from the project."
-        )
+    # Remove collaborator; the delete count tells us whether they were one
+    removed, _ = Project.collaborators.through.objects.filter(
+        project_id=project.pk, user_id=user_id
+    ).delete()
+
+    # Only the email is needed, for the message
+    email = get_object_or_404(User.objects.values_list("email", flat=True), pk=user_id)
+    if removed:
+        messages.success(request, f"{email} has been removed from the project.")
     else:
-        messages.warning(
-            request, f"{collaborator.email} is not a collaborator on this project."
-        )
+        messages.warning(request, f"{email} is not a collaborator on this project.")
 
     return redirect("projects:detail", pk=project.pk)
 
@@ -297,11 +404,15 @@ def remove_collaborator(request, pk, user_id):
 @require_http_methods(["POST"])
 def cancel_invitation(request, pk, invitation_id):
     """Cancel pending invitation."""
-    project = get_object_or_404(Project, pk=pk)
-    invitation = get_object_or_404(ProjectInvitation, pk=invitation_id, project=project)
+    invitation = get_object_or_404(
+        ProjectInvitation.objects.select_related("project"),
+        pk=invitation_id,
+        project_id=pk,
+    )
+    project = invitation.project
 
     # Only owner can cancel invitations
-    if request.user != project.owner:
+    if request.user.pk != project.owner_id:
         messages.error(request, "Only the project owner can cancel invitations.")
         return redirect("projects:detail", pk=project.pk)
 
@@ -323,10 +434,9 @@ def cancel_invitation(request, pk, invitation_id):
 @login_required
 def criteria_list(request, pk):
     """Display and manage project criteria."""
-    project = get_object_or_404(Project, pk=pk)
-
     # Check if user has access to this project
-    if not project.is_member(request.user):
+    project = _get_project_for_member(request, pk)
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
@@ -343,10 +453,15 @@ def criteria_list(request, pk):
 @login_required
 def criteria_create(request, pk):
     """Create new criteria for project."""
-    project = get_object_or_404(Project, pk=pk)
-
     # Check if user has access and project is active
-    if not project.is_member(request.user):
+    project = _get_project_for_member(
+        request,
+        pk,
+        Project.objects.annotate(
+            max_criteria_order=Coalesce(models.Max("criteria__order"), 0)
+        ),
+    )
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
@@ -355,43 +470,25 @@ def criteria_create(request, pk):
         return redirect("projects:criteria_list", pk=project.pk)
 
     if request.method == "POST":
-        form = CriteriaForm(request.POST)
+        form = CriteriaForm(request.POST, project=project)
         if form.is_valid():
             criteria = form.save(commit=False)
             criteria.project = project
 
             # Set order if not provided
             if not criteria.order:
-                max_order = (
-                    project.criteria.aggregate(max_order=models.Max("order"))[
-                        "max_order"
-                    ]
-                    or 0
-                )
-                criteria.order = max_order + 1
+                criteria.order = project.max_criteria_order + 1
 
-            try:
-                criteria.save()
+            if _save_unique_name(form, criteria.save, "criteria"):
                 messages.success(
                     request, f'Criteria "{criteria.name}" created successfully!'
                 )
                 return redirect("projects:criteria_list", pk=project.pk)
-            except Exception as e:
-                if "UNIQUE constraint failed" in str(e):
-                    form.add_error(
-                        "name",
-                        "A criteria with this name already exists in this project.",
-                    )
-                else:
-                    messages.error(
-                        request, "An error occurred while saving the criteria."
-                    )
     else:
         # Set default order
-        max_order = (
-            project.criteria.aggregate(max_order=models.Max("order"))["max_order"] or 0
+        form = CriteriaForm(
+            initial={"order": project.max_criteria_order + 1}, project=project
         )
-        form = CriteriaForm(initial={"order": max_order + 1})
 
     context = {"project": project, "form": form, "title": "Add New Criteria"}
     return render(request, "projects/criteria_form.html", context)
@@ -400,39 +497,28 @@ def criteria_create(request, pk):
 @login_required
 def criteria_edit(request, pk, criteria_id):
     """Edit existing criteria."""
-    project = get_object_or_404(Project, pk=pk)
-    criteria = get_object_or_404(Criteria, pk=criteria_id, project=project)
-
     # Check if user has access and project is active
-    if not project.is_member(request.user):
+    project = _get_project_for_member(request, pk)
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
+    criteria = get_object_or_404(Criteria, pk=criteria_id, project=project)
+
     if project.status != "active":
         messages.error(request, "Cannot edit criteria in finished projects.")
         return redirect("projects:criteria_list", pk=project.pk)
 
     if request.method == "POST":
-        form = CriteriaForm(request.POST, instance=criteria)
+        form = CriteriaForm(request.POST, instance=criteria, project=project)
         if form.is_valid():
-            try:
-                form.save()
+            if _save_unique_name(form, form.save, "criteria"):
                 messages.success(
                     request, f'Criteria "{criteria.name}" updated successfully!'
                 )
                 return redirect("projects:criteria_list", pk=project.pk)
-            except Exception as e:
-                if "UNIQUE constraint failed" in str(e):
-                    form.add_error(
-                        "name",
-                        "A criteria with this name already exists in this project.",
-                    )
-                else:
-                    messages.error(
-                        request, "An error occurred while updating the criteria."
-                    )
     else:
-        form = CriteriaForm(instance=criteria)
+        form = CriteriaForm(instance=criteria, project=project)
 
     context = {
         "project": project,
@@ -447,14 +533,14 @@ def criteria_edit(request, pk, criteria_id):
 @require_http_methods(["POST"])
 def criteria_delete(request, pk, criteria_id):
     """Delete criteria."""
-    project = get_object_or_404(Project, pk=pk)
-    criteria = get_object_or_404(Criteria, pk=criteria_id, project=project)
-
     # Check if user has access and project is active
-    if not project.is_member(request.user):
+    project = _get_project_for_member(request, pk)
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
+    criteria = get_object_or_404(Criteria, pk=criteria_id, project=project)
+
     if project.status != "active":
         messages.error(request, "Cannot delete criteria from finished projects.")
         return redirect("projects:criteria_list", pk=project.pk)
@@ -469,10 +555,9 @@ def criteria_delete(request, pk, criteria_id):
 @login_required
 def add_default_criteria(request, pk):
     """Add default criteria templates to project."""
-    project = get_object_or_404(Project, pk=pk)
-
     # Check if user has access and project is active
-    if not project.is_member(request.user):
+    project = _get_project_for_member(request, pk)
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
@@ -484,13 +569,19 @@ def add_default_criteria(request, pk):
         form = DefaultCriteriaForm(request.POST)
         if form.is_valid():
             template_criteria = form.get_template_criteria()
-            added_count = 0
-
-            for criteria_data in template_criteria:
-                # Check if criteria with this name already exists
-                if not project.criteria.filter(name=criteria_data["name"]).exists():
-                    Criteria.objects.create(project=project, **criteria_data)
-                    added_count += 1
+            existing_names = set(project.criteria.values_list("name", flat=True))
+
+            # Skip criteria with a name that already exists; ignore_conflicts
+            # covers names added concurrently since we read them
+            new_criteria = [
+                Criteria(project=project, **criteria_data)
+                for criteria_data in template_criteria
+                if criteria_data["name"] not in existing_names
+            ]
+            Criteria.objects.bulk_create(new_criteria, ignore_conflicts=True)
+            # Rows dropped by ignore_conflicts aren't reported back, so count
+            # what was actually added
+            added_count = project.criteria.count() - len(existing_names)
 
             if added_count > 0:
                 messages.success(
@@ -519,10 +610,11 @@ def add_default_criteria(request, pk):
 @login_required
 def visit_list(request, pk):
     """Display project visits."""
-    project = get_object_or_404(Project, pk=pk)
-
     # Check if user has access to this project
-    if not project.is_member(request.user):
+    project = _get_project_for_member(
+        request, pk, Project.objects.with_criteria_count()
+    )
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
@@ -536,13 +628,58 @@ def visit_list(request, pk):
     return render(request, "projects/visit_list.html", context)
 
 
+# The visit_create wizard carries its state between steps in a signed cookie
+# scoped to the wizard's URL, rather than in the session.
+VISIT_WIZARD_COOKIE = "visit_wizard"
+VISIT_WIZARD_SALT = "projects.visit_wizard"
+VISIT_WIZARD_MAX_AGE = 24 * 60 * 60
+# Browsers drop cookies over ~4KB (name and attributes included)
+VISIT_WIZARD_MAX_SIZE = 3800
+
+
+def _get_visit_wizard_state(request):
+    """Return the visit_create wizard state, or {} if missing or tampered with."""
+    value = request.COOKIES.get(VISIT_WIZARD_COOKIE)
+    if not value:
+        return {}
+    try:
+        return signing.loads(
+            value, salt=VISIT_WIZARD_SALT, max_age=VISIT_WIZARD_MAX_AGE
+        )
+    except signing.BadSignature:
+        return {}
+
+
+def _set_visit_wizard_state(request, response, state):
+    """
+    Store the visit_create wizard state on the response.
+
+    Returns False, without setting the cookie, if the state is too large to
+    fit in one.
+    """
+    value = signing.dumps(state, salt=VISIT_WIZARD_SALT, compress=True)
+    if len(value) > VISIT_WIZARD_MAX_SIZE:
+        return False
+    response.set_cookie(
+        VISIT_WIZARD_COOKIE,
+        value,
+        max_age=VISIT_WIZARD_MAX_AGE,
+        path=request.path,
+        secure=request.is_secure(),
+        httponly=True,
+        samesite="Lax",
+    )
+    return True
+
+
 @login_required
 def visit_create(request, pk):
     """Create new visit with multi-step form."""
-    project = get_object_or_404(Project, pk=pk)
-
     # Check if user has access and project is active
-    if not project.is_member(request.user):
+    project = _get_project_for_member(
+        request, pk, Project.objects.with_criteria_count()
+    )
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
@@ -551,7 +688,7 @@ def visit_create(request, pk):
         return redirect("projects:visit_list", pk=project.pk)
 
     # Check if project has criteria
-    if not project.criteria.exists():
+    if not project.criteria_count:
         messages.warning(
             request,
             "Please add some evaluation criteria before logging visits. "
@@ -563,7 +700,10 @@ def visit_create(request, pk):
 
     if request.method == "POST":
         logger.info(
-            f"Visit creation POST request - Step: {step}, User: {request.user.id}, Project: {project.id}"
+            "Visit creation POST request - Step: %s, User: %s, Project: %s",
+            step,
+            request.user.pk,
+            project.pk,
         )
 
         if step == "1":
@@ -583,26 +723,29 @@ def visit_create(request, pk):
                 )
 
             if visit_form.is_valid():
-                logger.info("Step 1 form valid - storing data in session")
-                # Store form data in session
+                logger.info("Step 1 form valid - storing data in wizard cookie")
+                # Store form data in the wizard cookie
                 cleaned_data = visit_form.cleaned_data.copy()
-                # Remove realtor_choice from session data as it's not a model field
+                # Remove realtor_choice from the stored data as it's not a model field
                 cleaned_data.pop("realtor_choice", None)
-                request.session["visit_data"] = cleaned_data
-                request.session["visit_data"]["visit_date"] = cleaned_data[
-                    "visit_date"
-                ].isoformat()
+                cleaned_data["visit_date"] = cleaned_data["visit_date"].isoformat()
                 # Handle realtor field
-                if cleaned_data.get("realtor"):
-                    request.session["visit_data"]["realtor_id"] = cleaned_data[
-                        "realtor"
-                    ].id
-                    request.session["visit_data"].pop(
-                        "realtor", None
-                    )  # Remove non-serializable object
-                return redirect(f"{request.path}?step=2")
+                realtor = cleaned_data.pop("realtor", None)  # Not serializable
+                if realtor:
+                    cleaned_data["realtor_id"] = realtor.id
+
+                response = redirect(f"{request.path}?step=2")
+                if _set_visit_wizard_state(
+                    request, response, {"visit_data": cleaned_data}
+                ):
+                    return response
+                visit_form.add_error(
+                    None,
+                    "This visit has too much text to carry over to the next step. "
+                    "Please shorten the notes and try again.",
+                )
             else:
-                logger.warning(f"Step 1 form invalid - errors: {visit_form.errors}")
+                logger.warning("Step 1 form invalid - errors: %s", visit_form.errors)
                 # Form has errors, will be displayed in the template
 
         elif step == "2":
@@ -610,18 +753,18 @@ def visit_create(request, pk):
             assessment_form = VisitAssessmentForm(project, request.POST)
             if assessment_form.is_valid():
                 logger.info("Step 2 form valid - creating visit")
-                # Get visit data from session
-                visit_data = request.session.get("visit_data")
+                # Get visit data from the wizard cookie
+                visit_data = _get_visit_wizard_state(request).get("visit_data")
                 if not visit_data:
-                    logger.error("Step 2 - no visit data in session")
+                    logger.error("Step 2 - no visit data in wizard cookie")
                     messages.error(request, "Session expired. Please start over.")
                     return redirect("projects:visit_create", pk=project.pk)
 
                 try:
-                    # Create visit
-                    visit_data["visit_date"] = datetime.fromisoformat(
+                    # The cookie carries visit_date as an ISO date string
+                    visit_data["visit_date"] = date.fromisoformat(
                         visit_data["visit_date"]
-                    ).date()
+                    )
 
                     # Handle realtor
                     realtor = None
@@ -639,34 +782,30 @@ def visit_create(request, pk):
                         realtor=realtor,
                         **visit_data,
                     )
-                    logger.info(f"Visit created with ID: {visit.id}")
+                    logger.info("Visit created with ID: %s", visit.pk)
 
                     # Save assessments
                     assessments = assessment_form.save_assessments(visit)
-                    logger.info(f"Saved {len(assessments)} assessments")
-
-                    # Store visit ID for photo upload
-                    request.session["visit_id"] = visit.id
+                    logger.info("Saved %s assessments", len(assessments))
 
-                    # Clear visit data from session
-                    if "visit_data" in request.session:
-                        del request.session["visit_data"]
-
-                    return redirect(f"{request.path}?step=3")
+                    # Replace the visit data with the visit ID for photo upload
+                    response = redirect(f"{request.path}?step=3")
+                    _set_visit_wizard_state(request, response, {"visit_id": visit.id})
+                    return response
 
                 except Exception as e:
-                    logger.error(f"Error creating visit: {str(e)}")
+                    logger.error("Error creating visit: %s", e)
                     messages.error(request, f"Error creating visit: {str(e)}")
                     return redirect("projects:visit_create", pk=project.pk)
             else:
                 logger.warning(
-                    f"Step 2 form invalid - errors: {assessment_form.errors}"
+                    "Step 2 form invalid - errors: %s", assessment_form.errors
                 )
                 # Form has errors, will be displayed in the template
 
         elif step == "3":
             # Step 3: Photo upload
-            visit_id = request.session.get("visit_id")
+            visit_id = _get_visit_wizard_state(request).get("visit_id")
             if not visit_id:
                 messages.error(request, "Session expired. Please start over.")
                 return redirect("projects:visit_create", pk=project.pk)
@@ -674,7 +813,7 @@ def visit_create(request, pk):
             visit = get_object_or_404(Visit, pk=visit_id, project=project)
 
             # Handle photo uploads
-            photos_uploaded = 0
+            photos = []
             for i in range(5):  # Max 5 photos
                 photo_file = request.FILES.get(f"photo_{i}")
                 caption = request.POST.get(f"caption_{i}", "")
@@ -687,20 +826,23 @@ def visit_create(request, pk):
                         )
                         continue
 
-                    if not photo_file.content_type.startswith("image/"):
+                    if photo_file.content_type not in ALLOWED_PHOTO_CONTENT_TYPES:
                         messages.warning(
                             request, f"Photo {i+1} was not a valid image and skipped."
                         )
                         continue
 
-                    VisitPhoto.objects.create(
-                        visit=visit, image=photo_file, caption=caption, order=i
+                    photos.append(
+                        VisitPhoto(
+                            visit=visit, image=photo_file, caption=caption, order=i
+                        )
                     )
-                    photos_uploaded += 1
 
-            # Clear session
-            if "visit_id" in request.session:
-                del request.session["visit_id"]
+            # One INSERT for all photos, committed together; each file is still
+            # written to storage as its row is prepared
+            with transaction.atomic():
+                VisitPhoto.objects.bulk_create(photos)
+            photos_uploaded = len(photos)
 
             if photos_uploaded > 0:
                 messages.success(
@@ -710,7 +852,12 @@ def visit_create(request, pk):
             else:
                 messages.success(request, f'Visit "{visit.name}" created successfully!')
 
-            return redirect("projects:visit_detail", pk=project.pk, visit_id=visit.pk)
+            # Clear wizard state
+            response = redirect(
+                "projects:visit_detail", pk=project.pk, visit_id=visit.pk
+            )
+            response.delete_cookie(VISIT_WIZARD_COOKIE, path=request.path)
+            return response
 
     # GET request or form with errors - show appropriate step
     if step == "1":
@@ -728,9 +875,9 @@ def visit_create(request, pk):
 
     elif step == "2":
         # Check if we have visit data from step 1
-        visit_data = request.session.get("visit_data")
+        visit_data = _get_visit_wizard_state(request).get("visit_data")
         if not visit_data:
-            logger.warning("Step 2 GET - no visit data in session")
+            logger.warning("Step 2 GET - no visit data in wizard cookie")
             messages.error(request, "Please complete step 1 first.")
             return redirect("projects:visit_create", pk=project.pk)
 
@@ -741,7 +888,10 @@ def visit_create(request, pk):
         context = {
             "project": project,
             "form": assessment_form,
-            "visit_data": visit_data,
+            "visit_data": {
+                **visit_data,
+                "visit_date": date.fromisoformat(visit_data["visit_date"]),
+            },
             "step": 2,
             "title": "Step 2: Property Assessment",
         }
@@ -749,7 +899,7 @@ def visit_create(request, pk):
 
     elif step == "3":
         # Check if we have visit ID
-        visit_id = request.session.get("visit_id")
+        visit_id = _get_visit_wizard_state(request).get("visit_id")
         if not visit_id:
             messages.error(request, "Please complete steps 1 and 2 first.")
             return redirect("projects:visit_create", pk=project.pk)
@@ -770,24 +920,31 @@ def visit_create(request, pk):
 @login_required
 def visit_detail(request, pk, visit_id):
     """Display visit details."""
-    project = get_object_or_404(Project, pk=pk)
-    visit = get_object_or_404(Visit, pk=visit_id, project=project)
-
     # Check if user has access to this project
-    if not project.is_member(request.user):
+    project = _get_project_for_member(request, pk)
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
-    assessments = visit.assessments.select_related("criteria").order_by(
-        "criteria__order"
+    visit = get_object_or_404(
+        Visit.objects.select_related("created_by").prefetch_related(
+            models.Prefetch(
+                "assessments",
+                queryset=VisitAssessment.objects.select_related("criteria").order_by(
+                    "criteria__order"
+                ),
+            ),
+            "photos",
+        ),
+        pk=visit_id,
+        project=project,
     )
-    photos = visit.photos.all()
 
     context = {
         "project": project,
         "visit": visit,
-        "assessments": assessments,
-        "photos": photos,
+        "assessments": visit.assessments.all(),
+        "photos": visit.photos.all(),
         "can_edit": project.status == "active",
     }
     return render(request, "projects/visit_detail.html", context)
@@ -796,14 +953,14 @@ def visit_detail(request, pk, visit_id):
 @login_required
 def visit_edit(request, pk, visit_id):
     """Edit existing visit."""
-    project = get_object_or_404(Project, pk=pk)
-    visit = get_object_or_404(Visit, pk=visit_id, project=project)
-
     # Check if user has access and project is active
-    if not project.is_member(request.user):
+    project = _get_project_for_member(request, pk)
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
+    visit = get_object_or_404(Visit, pk=visit_id, project=project)
+
     if project.status != "active":
         messages.error(request, "Cannot edit visits in finished projects.")
         return redirect("projects:visit_detail", pk=project.pk, visit_id=visit.pk)
@@ -827,8 +984,8 @@ def visit_edit(request, pk, visit_id):
 
         # Pre-populate assessment form with existing data
         initial_data = {}
-        for assessment in visit.assessments.all():
-            field_name = f"criteria_{assessment.criteria.id}"
+        for assessment in visit.assessments.select_related("criteria"):
+            field_name = f"criteria_{assessment.criteria_id}"
             initial_data[field_name] = assessment.get_value()
 
         assessment_form = VisitAssessmentForm(project, initial=initial_data)
@@ -846,14 +1003,14 @@ def visit_edit(request, pk, visit_id):
 @require_http_methods(["POST"])
 def visit_delete(request, pk, visit_id):
     """Delete visit."""
-    project = get_object_or_404(Project, pk=pk)
-    visit = get_object_or_404(Visit, pk=visit_id, project=project)
-
     # Check if user has access and project is active
-    if not project.is_member(request.user):
+    project = _get_project_for_member(request, pk)
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
+    visit = get_object_or_404(Visit, pk=visit_id, project=project)
+
     if project.status != "active":
         messages.error(request, "Cannot delete visits from finished projects.")
         return redirect("projects:visit_detail", pk=project.pk, visit_id=visit.pk)
@@ -873,10 +1030,9 @@ def visit_delete(request, pk, visit_id):
 @login_required
 def realtor_list(request, pk):
     """Display project realtors."""
-    project = get_object_or_404(Project, pk=pk)
-
     # Check if user has access to this project
-    if not project.is_member(request.user):
+    project = _get_project_for_member(request, pk)
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
@@ -893,10 +1049,9 @@ def realtor_list(request, pk):
 @login_required
 def realtor_create(request, pk):
     """Create new realtor for project."""
-    project = get_object_or_404(Project, pk=pk)
-
     # Check if user has access and project is active
-    if not project.is_member(request.user):
+    project = _get_project_for_member(request, pk)
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
@@ -905,30 +1060,19 @@ def realtor_create(request, pk):
         return redirect("projects:realtor_list", pk=project.pk)
 
     if request.method == "POST":
-        form = RealtorForm(request.POST)
+        form = RealtorForm(request.POST, project=project)
         if form.is_valid():
             realtor = form.save(commit=False)
             realtor.project = project
             realtor.created_by = request.user
 
-            try:
-                realtor.save()
+            if _save_unique_name(form, realtor.save, "realtor"):
                 messages.success(
                     request, f'Realtor "{realtor.name}" added to project successfully!'
                 )
                 return redirect("projects:realtor_list", pk=project.pk)
-            except Exception as e:
-                if "UNIQUE constraint failed" in str(e):
-                    form.add_error(
-                        "name",
-                        "A realtor with this name already exists in this project.",
-                    )
-                else:
-                    messages.error(
-                        request, "An error occurred while saving the realtor."
-                    )
     else:
-        form = RealtorForm()
+        form = RealtorForm(project=project)
 
     context = {"project": project, "form": form, "title": "Add New Realtor"}
     return render(request, "projects/realtor_form.html", context)
@@ -937,39 +1081,28 @@ def realtor_create(request, pk):
 @login_required
 def realtor_edit(request, pk, realtor_id):
     """Edit existing realtor."""
-    project = get_object_or_404(Project, pk=pk)
-    realtor = get_object_or_404(Realtor, pk=realtor_id, project=project)
-
-    # Check if user has access and can edit
-    if not realtor.can_be_edited_by(request.user):
+    # Any project member can edit project realtors
+    project = _get_project_for_member(request, pk)
+    if project is None:
         messages.error(request, "You don't have permission to edit this realtor.")
-        return redirect("projects:realtor_list", pk=project.pk)
+        return redirect("projects:list")
+
+    realtor = get_object_or_404(Realtor, pk=realtor_id, project=project)
 
     if project.status != "active":
         messages.error(request, "Cannot edit realtors in finished projects.")
         return redirect("projects:realtor_list", pk=project.pk)
 
     if request.method == "POST":
-        form = RealtorForm(request.POST, instance=realtor)
+        form = RealtorForm(request.POST, instance=realtor, project=project)
         if form.is_valid():
-            try:
-                form.save()
+            if _save_unique_name(form, form.save, "realtor"):
                 messages.success(
                     request, f'Realtor "{realtor.name}" updated successfully!'
                 )
                 return redirect("projects:realtor_list", pk=project.pk)
-            except Exception as e:
-                if "UNIQUE constraint failed" in str(e):
-                    form.add_error(
-                        "name",
-                        "A realtor with this name already exists in this project.",
-                    )
-                else:
-                    messages.error(
-                        request, "An error occurred while updating the realtor."
-                    )
     else:
-        form = RealtorForm(instance=realtor)
+        form = RealtorForm(instance=realtor, project=project)
 
     context = {
         "project": project,
@@ -984,8 +1117,13 @@ def realtor_edit(request, pk, realtor_id):
 @require_http_methods(["POST"])
 def realtor_delete(request, pk, realtor_id):
     """Delete realtor."""
-    project = get_object_or_404(Project, pk=pk)
+    project = _get_project_for_member(request, pk)
+    if project is None:
+        messages.error(request, "You don't have access to this project.")
+        return redirect("projects:list")
+
     realtor = get_object_or_404(Realtor, pk=realtor_id, project=project)
+    realtor.project = project
 
     # Check if user has permission to delete
     if not realtor.can_be_deleted_by(request.user):
@@ -1009,32 +1147,64 @@ def realtor_delete(request, pk, realtor_id):
 @login_required
 def comparison_table(request, pk):
     """Display comparison table with visits and criteria."""
-    project = get_object_or_404(Project, pk=pk)
-
     # Check if user has access to this project
-    if not project.is_member(request.user):
+    project = _get_project_for_member(request, pk)
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
-    # Get all visits and criteria
-    visits = project.visits.prefetch_related("assessments__criteria").order_by(
-        "-visit_date"
+    # Get all criteria and visits
+    criteria = list(
+        project.criteria.only(*COMPARISON_CRITERIA_FIELDS).order_by("order")
     )
-    criteria = project.criteria.all().order_by("order")
+    criteria_by_id = {criterion.id: criterion for criterion in criteria}
+
+    # Handle sorting
+    sort_by = request.GET.get("sort")
+    sort_order = request.GET.get("order", "desc")
+    try:
+        sort_criterion = criteria_by_id.get(int(sort_by)) if sort_by else None
+    except (ValueError, TypeError):
+        sort_criterion = None
+
+    visits = _get_comparison_visits(project)
+    sort_field = None
+    if sort_criterion is not None and sort_criterion.type != "text":
+        sort_field = ASSESSMENT_VALUE_FIELDS[sort_criterion.type]
+    if sort_field:
+        # Let the database order by the criterion's value, missing values last
+        sort_value = models.F("sort_value")
+        visits = visits.annotate(
+            sort_value=models.Subquery(
+                VisitAssessment.objects.filter(
+                    visit=models.OuterRef("pk"), criteria=sort_criterion
+                ).values(sort_field)[:1]
+            )
+        ).order_by(
+            (
+                sort_value.desc(nulls_last=True)
+                if sort_order == "desc"
+                else sort_value.asc(nulls_last=True)
+            ),
+            "-visit_date",
+        )
+    visits = list(visits)
 
     # Check if there's data to compare
-    if not visits.exists():
+    if not visits:
         messages.info(
             request, "No visits to compare yet. Add some property visits first."
         )
         return redirect("projects:visit_list", pk=project.pk)
 
-    if not criteria.exists():
+    if not criteria:
         messages.info(
             request, "No criteria defined yet. Add evaluation criteria first."
         )
         return redirect("projects:criteria_list", pk=project.pk)
 
+    format_value = _memoized_value_formatter()
+
     # Build comparison data structure
     comparison_data = []
     criteria_stats = {}  # For color coding
@@ -1042,7 +1212,6 @@ def comparison_table(request, pk):
     # Initialize criteria stats
     for criterion in criteria:
         criteria_stats[criterion.id] = {
-            "values": [],
             "min_val": None,
             "max_val": None,
             "type": criterion.type,
@@ -1053,7 +1222,7 @@ def comparison_table(request, pk):
         visit_data = {"visit": visit, "assessments": {}}
 
         # Get assessments for this visit
-        assessments = {a.criteria.id: a for a in visit.assessments.all()}
+        assessments = _get_assessments_by_criteria(visit, criteria_by_id)
 
         for criterion in criteria:
             assessment = assessments.get(criterion.id)
@@ -1061,46 +1230,38 @@ def comparison_table(request, pk):
             visit_data["assessments"][criterion.id] = {
                 "assessment": assessment,
                 "value": value,
-                "display_value": format_assessment_value(value, criterion.type),
+                "display_value": format_value(value, criterion.type),
             }
 
-            # Collect numeric values for statistics (for color coding)
+            # Track the numeric range as we go (for color coding)
             if value is not None and criterion.type in ["numeric", "rating"]:
                 try:
                     numeric_value = float(value)
-                    criteria_stats[criterion.id]["values"].append(numeric_value)
                 except (ValueError, TypeError):
                     pass
+                else:
+                    stats = criteria_stats[criterion.id]
+                    if stats["min_val"] is None or numeric_value < stats["min_val"]:
+                        stats["min_val"] = numeric_value
+                    if stats["max_val"] is None or numeric_value > stats["max_val"]:
+                        stats["max_val"] = numeric_value
 
         comparison_data.append(visit_data)
 
-    # Calculate min/max for color coding
-    for criterion_id, stats in criteria_stats.items():
-        if stats["values"]:
-            stats["min_val"] = min(stats["values"])
-            stats["max_val"] = max(stats["values"])
+    # Text criteria are still sorted here, as before
+    if sort_criterion is not None and not sort_field:
+        criterion_id = sort_criterion.id
 
-    # Handle sorting
-    sort_by = request.GET.get("sort")
-    sort_order = request.GET.get("order", "desc")
+        def sort_key(item):
+            value = item["assessments"][criterion_id]["value"]
+            if value is None:
+                return float("-inf") if sort_order == "desc" else float("inf")
+            try:
+                return float(value)
+            except (ValueError, TypeError):
+                return str(value) if value else ""
 
-    if sort_by:
-        try:
-            criterion_id = int(sort_by)
-            if any(c.id == criterion_id for c in criteria):
-                # Sort by this criterion
-                def sort_key(item):
-                    value = item["assessments"][criterion_id]["value"]
-                    if value is None:
-                        return float("-inf") if sort_order == "desc" else float("inf")
-                    try:
-                        return float(value)
-                    except (ValueError, TypeError):
-                        return str(value) if value else ""
-
-                comparison_data.sort(key=sort_key, reverse=(sort_order == "desc"))
-        except (ValueError, TypeError):
-            pass
+        comparison_data.sort(key=sort_key, reverse=(sort_order == "desc"))
 
     context = {
         "project": project,
@@ -1115,6 +1276,36 @@ def comparison_table(request, pk):
     return render(request, "projects/comparison_table.html", context)
 
 
+def _get_comparison_visits(project):
+    """Return a project's visits with the data the comparison table reads."""
+    return (
+        project.visits.select_related("realtor")
+        .prefetch_related(
+            models.Prefetch(
+                "assessments",
+                queryset=VisitAssessment.objects.only(*COMPARISON_ASSESSMENT_FIELDS),
+            )
+        )
+        .order_by("-visit_date")
+    )
+
+
+def _get_assessments_by_criteria(visit, criteria_by_id):
+    """
+    Map criteria id to assessment for a visit's prefetched assessments.
+
+    Each assessment gets its criteria from ``criteria_by_id`` so get_value()
+    can read the type without loading the criteria again.
+    """
+    assessments = {}
+    for assessment in visit.assessments.all():
+        criterion = criteria_by_id.get(assessment.criteria_id)
+        if criterion is not None:
+            assessment.criteria = criterion
+            assessments[criterion.id] = assessment
+    return assessments
+
+
 def format_assessment_value(value, criteria_type):
     """Format assessment value for display."""
     if value is None:
@@ -1138,55 +1329,94 @@ def format_assessment_value(value, criteria_type):
         return str(value)
 
 
+def _memoized_value_formatter():
+    """
+    Return a per-request format_assessment_value that reuses earlier results.
+
+    Boolean, rating and numeric cells repeat a handful of values across many
+    visits, so each distinct (type, value) pair is only formatted once. Text
+    values are rarely repeated and are formatted directly.
+    """
+    cache = {}
+
+    def format_value(value, criteria_type):
+        if criteria_type == "text":
+            return format_assessment_value(value, criteria_type)
+        key = (criteria_type, value)
+        try:
+            return cache[key]
+        except KeyError:
+            formatted = cache[key] = format_assessment_value(value, criteria_type)
+            return formatted
+
+    return format_value
+
+
+class Echo:
+    """File-like object that returns what is written, for streaming csv rows."""
+
+    def write(self, value):
+        return value
+
+
 @login_required
 def export_csv(request, pk):
     """Export comparison data as CSV."""
-    project = get_object_or_404(Project, pk=pk)
-
     # Check if user has access to this project
-    if not project.is_member(request.user):
+    project = _get_project_for_member(request, pk)
+    if project is None:
         messages.error(request, "You don't have access to this project.")
         return redirect("projects:list")
 
-    # Create HTTP response with CSV content type
-    response = HttpResponse(content_type="text/csv")
+    # Get data
+    visits = project.visits.select_related("realtor").order_by("-visit_date")
+    criteria = list(
+        project.criteria.only(*COMPARISON_CRITERIA_FIELDS).order_by("order")
+    )
+    criteria_by_id = {criterion.id: criterion for criterion in criteria}
+
+    def rows():
+        writer = csv.writer(Echo())
+        format_value = _memoized_value_formatter()
+
+        # Write header row
+        header = ["Visit Name", "Address", "Visit Date", "Realtor", "Notes"]
+        header.extend([criterion.name for criterion in criteria])
+        yield writer.writerow(header)
+
+        # Read every assessment value in one flat query rather than building a
+        # model instance per cell: {visit id: {criteria id: value}}
+        cell_values = defaultdict(dict)
+        for assessment in VisitAssessment.objects.filter(visit__project=project).values(
+            "visit_id", "criteria_id", *ASSESSMENT_VALUE_FIELDS.values()
+        ):
+            criterion = criteria_by_id.get(assessment["criteria_id"])
+            if criterion is not None:
+                field = ASSESSMENT_VALUE_FIELDS.get(criterion.type, "value_text")
+                cell_values[assessment["visit_id"]][criterion.id] = assessment[field]
+
+        # Write data rows, fetching visits in chunks rather than all at once
+        for visit in visits.iterator(chunk_size=2000):
+            visit_values = cell_values.get(visit.pk, {})
+
+            row = [
+                visit.name,
+                visit.address,
+                visit.visit_date.strftime("%Y-%m-%d"),
+                str(visit.realtor) if visit.realtor else "",
+                visit.notes,
+            ]
+
+            # Add assessment values
+            for criterion in criteria:
+                value = visit_values.get(criterion.id)
+                row.append(format_value(value, criterion.type))
+
+            yield writer.writerow(row)
+
+    # Stream the CSV row by row instead of building it in memory
+    response = StreamingHttpResponse(rows(), content_type="text/csv")
     response["Content-Disposition"] = (
         f'attachment; filename="{project.name}_comparison.csv"'
     )
-
-    writer = csv.writer(response)
-
-    # Get data
-    visits = project.visits.prefetch_related("assessments__criteria").order_by(
-        "-visit_date"
-    )
-    criteria = project.criteria.all().order_by("order")
-
-    # Write header row
-    header = ["Visit Name", "Address", "Visit Date", "Realtor", "Notes"]
-    header.extend([criterion.name for criterion in criteria])
-    writer.writerow(header)
-
-    # Write data rows
-    for visit in visits:
-        # Get assessments for this visit
-        assessments = {a.criteria.id: a for a in visit.assessments.all()}
-
-        row = [
-            visit.name,
-            visit.address,
-            visit.visit_date.strftime("%Y-%m-%d"),
-            str(visit.realtor) if visit.realtor else "",
-            visit.notes,
-        ]
-
-        # Add assessment values
-        for criterion in criteria:
-            assessment = assessments.get(criterion.id)
-            value = assessment.get_value() if assessment else None
-            formatted_value = format_assessment_value(value, criterion.type)
-            row.append(formatted_value)
-
-        writer.writerow(row)
-
     return response